@@ -0,0 +1,265 @@
+# Headless 리포트 API (ASGI): uvicorn api:app --workers N
+# Streamlit 없이 UniversalEngine.generate_full_report를 HTTP/JSON으로 제공한다.
+#
+#   POST /report  {"name": "홍길동", "gender": "M", "birth": "19800101", "hour": 12, "minute": 0,
+#                  "calendar": "solar" | "lunar", "leap": false, "lang": "KO" | "EN",
+#                  "format": "html" | "json" | "text", "chart": "png" | "svg"}
+#   POST /timeline {"birth": "19800101", "hour": 12, "calendar": "solar", "leap": false,
+#                   "unit": "day" | "month" | "year", "start": "2026-01-01", "end": "2036-01-01"}
+#                  -> NDJSON 스트림 (한 줄에 한 기간: period, ganji, stem_ship, branch_ship)
+#                  hour는 0~23, start/end는 만세력 범위(1900-01-01 ~ 2100-12-31) 안, 최대 100년
+#   POST /search  {"year": "甲辰", "month": "?寅", "day": "甲子", "time": null, "limit": 100}
+#                  -> 명식(부분 패턴, "?" 와일드카드)에 맞는 출생 시각 구간 {count, matches: [{start, end}]}
+#   GET  /healthz
+#   GET  /metrics  (Prometheus 텍스트: 리포트 캐시 통계, SAJU_METRICS=1일 때 단계별 계측.
+#                   프로세스 풀이면 각 워커가 결과와 함께 돌려준 통계를 합산)
+#
+# 환경 변수
+#   SAJU_API_POOL     "process" (기본) | "thread" - CPU 작업을 실행할 풀 종류
+#   SAJU_API_WORKERS  풀 크기 (기본: CPU 코어 수)
+
+import asyncio
+import collections
+import concurrent.futures
+import datetime
+import itertools
+import json
+import os
+
+import app as saju
+
+POOL_KIND = os.environ.get("SAJU_API_POOL", "process")
+POOL_WORKERS = int(os.environ.get("SAJU_API_WORKERS", "0")) or os.cpu_count()
+
+_pool = None
+_worker_stats = {}  # 워커 pid -> 마지막으로 받은 (리포트 캐시 stats, 단계별 계측 snapshot)
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        # 워커마다(프로세스 풀) 운세 사전 계산/자정 롤오버 스레드를 띄운다
+        if POOL_KIND == "thread":
+            _pool = concurrent.futures.ThreadPoolExecutor(max_workers=POOL_WORKERS)
+            saju.start_fortune_rollover()
+        else:
+            _pool = concurrent.futures.ProcessPoolExecutor(max_workers=POOL_WORKERS,
+                                                           initializer=saju.start_fortune_rollover)
+    return _pool
+
+
+def _load_object(body):
+    """요청 본문 -> JSON 객체(dict). 객체가 아니면 BadRequest."""
+    req = json.loads(body or b"{}")
+    if not isinstance(req, dict):
+        raise BadRequest("request body must be a JSON object")
+    return req
+
+
+def parse_request(body):
+    """JSON 요청 -> generate_full_report 인자. 잘못된 입력은 BadRequest."""
+    try:
+        req = _load_object(body)
+        lang = req.get("lang", "KO")
+        L = saju.LANG_PACK[lang]
+        name = str(req["name"]).strip()
+        birth = str(req["birth"])
+        hour = int(req.get("hour", 12))
+        minute = int(req.get("minute", 0))
+        gender = L["gender_f"] if str(req.get("gender", "M")).upper() in ("F", "FEMALE", "여자") else L["gender_m"]
+        is_lunar = req.get("calendar", "solar") == "lunar"
+        is_leap = bool(req.get("leap", False))
+        fmt = str(req.get("format", "html"))
+        chart_format = str(req.get("chart", "png"))
+    except (KeyError, TypeError, ValueError) as e:
+        raise BadRequest(f"invalid request: {e}") from e
+    if not name or len(birth) != 8 or not birth.isdigit() or not 0 <= hour <= 23 or not 0 <= minute <= 59:
+        raise BadRequest(L["err_msg"])
+    if fmt not in saju.RENDERERS:
+        raise BadRequest(f"unknown format: {fmt}")
+    if chart_format not in saju.CHART_RENDERERS:
+        raise BadRequest(f"unknown chart: {chart_format}")
+    return (name, gender, int(birth[:4]), int(birth[4:6]), int(birth[6:8]), hour, is_lunar, is_leap, lang, fmt,
+            chart_format, minute)
+
+
+def build_report(name, gender, y, m, d, h, is_lunar, is_leap, lang, fmt="html", chart_format="png", mi=0):
+    """풀 워커에서 실행되는 CPU 구간: 음력 변환 + 리포트 생성."""
+    try:
+        y, m, d, solar_str = saju.to_solar(y, m, d, is_lunar, is_leap)
+        report = saju.get_report_cache().get_report(saju.get_engine(), name, gender, y, m, d, h, is_lunar, solar_str, lang,
+                                                    chart_format=chart_format, mi=mi)
+    except ValueError as e:
+        raise BadRequest(f"invalid date: {e}") from e
+    if fmt == "json":
+        return {"solar_date": solar_str, "report": report.to_dict()}
+    return {"solar_date": solar_str, fmt: saju.render_report(report, fmt)}
+
+
+SEARCH_MAX_LIMIT = 1000
+
+
+def search_pillars(body):
+    """역방향 명식 검색. 색인은 이 프로세스에서 한 번 만들고 질의는 수 ms라 풀을 거치지 않는다."""
+    try:
+        req = _load_object(body)
+        patterns = {p: req.get(p) for p in saju.PILLAR_NAMES}
+        limit = max(0, min(int(req.get("limit", 100)), SEARCH_MAX_LIMIT))
+        for pattern in patterns.values():
+            saju.parse_pillar_pattern(pattern)
+    except (TypeError, ValueError) as e:
+        raise BadRequest(f"invalid request: {e}") from e
+    index = saju.get_pillar_index()
+    ids = index.query_ids(**patterns)
+    return {"count": len(ids), "matches": [{"start": s.isoformat(), "end": e.isoformat()}
+                                           for s, e in index.intervals(ids[:limit])]}
+
+
+def _process_stats():
+    return os.getpid(), (saju.get_report_cache().stats(), saju.METRICS.snapshot())
+
+
+def _run_report(*args):
+    """풀 워커 진입점: build_report 결과와 이 워커의 캐시 통계/계측 snapshot을 함께 돌려준다."""
+    return build_report(*args), _process_stats()
+
+
+def _current_stats():
+    """워커별 최신 통계에 이 프로세스(스레드 풀이면 워커 자신)의 현재 값을 덮어쓴 목록."""
+    pid, stats = _process_stats()
+    return list({**_worker_stats, pid: stats}.values())
+
+
+def merged_cache_stats():
+    """워커별 최신 캐시 통계 합산. 스레드 풀이면 이 프로세스 하나뿐이다."""
+    total = collections.Counter()
+    for stats, _ in _current_stats():
+        total.update({k: v for k, v in stats.items() if k != "hit_ratio"})
+    lookups = total["l1_hits"] + total["l2_hits"] + total["misses"]
+    return dict(total, hit_ratio=(lookups - total["misses"]) / lookups if lookups else 0.0)
+
+
+def merged_stage_snapshot():
+    """워커별 최신 단계별 계측 합산 (StageMetrics.merge)."""
+    return saju.StageMetrics.merge(snap for _, snap in _current_stats())
+
+
+TIMELINE_CHUNK = 512  # 스트리밍 시 한 번에 내보내는 줄 수
+TIMELINE_MAX_DAYS = 366 * 100
+
+
+def parse_timeline_request(body):
+    """JSON 요청 -> (Timeline, 기간 이터레이터). 잘못된 입력은 BadRequest."""
+    try:
+        req = _load_object(body)
+        birth = str(req["birth"])
+        hour = int(req.get("hour", 12))
+        y, m, d, _ = saju.to_solar(int(birth[:4]), int(birth[4:6]), int(birth[6:8]),
+                                   req.get("calendar", "solar") == "lunar", bool(req.get("leap", False)))
+        unit = req.get("unit", "day")
+        start, end = datetime.date.fromisoformat(req["start"]), datetime.date.fromisoformat(req["end"])
+    except (KeyError, TypeError, ValueError) as e:
+        raise BadRequest(f"invalid request: {e}") from e
+    if not 0 <= hour <= 23:
+        raise BadRequest(f"hour out of range: {hour}")
+    if not saju.MANSE_START <= start or not end <= saju.MANSE_END:
+        raise BadRequest(f"start and end must be within {saju.MANSE_START} ~ {saju.MANSE_END}")
+    if not start < end or (end - start).days > TIMELINE_MAX_DAYS:
+        raise BadRequest("start must be before end and the range at most 100 years")
+    timeline = saju.Timeline.for_birth(y, m, d, hour)
+    if unit == "day":
+        return timeline.days(start, end)
+    if unit == "month":
+        return timeline.months((start.year, start.month), (end.year, end.month))
+    if unit == "year":
+        return timeline.years(start.year, end.year)
+    raise BadRequest(f"unknown unit: {unit}")
+
+
+def _timeline_line(entry):
+    period = entry.period.isoformat() if isinstance(entry.period, datetime.date) else entry.period
+    return {"period": period, "ganji": saju.GAN_HANJA[entry.stem] + saju.JI_HANJA[entry.branch],
+            "stem_ship": entry.stem_ship, "branch_ship": entry.branch_ship}
+
+
+async def _stream_timeline(send, entries):
+    await send({"type": "http.response.start", "status": 200,
+                "headers": [(b"content-type", b"application/x-ndjson; charset=utf-8")]})
+    while True:
+        chunk = list(itertools.islice(entries, TIMELINE_CHUNK))
+        if not chunk:
+            break
+        data = "".join(json.dumps(_timeline_line(e), ensure_ascii=False) + "\n" for e in chunk)
+        await send({"type": "http.response.body", "body": data.encode(), "more_body": True})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def _read_body(receive):
+    body, more = b"", True
+    while more:
+        msg = await receive()
+        body += msg.get("body", b"")
+        more = msg.get("more_body", False)
+    return body
+
+
+async def _send_json(send, status, payload):
+    data = json.dumps(payload, ensure_ascii=False).encode()
+    await send({"type": "http.response.start", "status": status,
+                "headers": [(b"content-type", b"application/json; charset=utf-8"),
+                            (b"content-length", str(len(data)).encode())]})
+    await send({"type": "http.response.body", "body": data})
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        while True:
+            msg = await receive()
+            if msg["type"] == "lifespan.startup":
+                _get_pool()
+                await send({"type": "lifespan.startup.complete"})
+            elif msg["type"] == "lifespan.shutdown":
+                if _pool is not None:
+                    _pool.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+    if scope["type"] != "http":
+        return
+    method, path = scope["method"], scope["path"]
+    if path == "/healthz" and method == "GET":
+        return await _send_json(send, 200, {"status": "ok"})
+    if path == "/metrics" and method == "GET":
+        data = (saju.METRICS.prometheus(snapshot=merged_stage_snapshot())
+                + saju.ReportCache.prometheus(merged_cache_stats())).encode()
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"text/plain; version=0.0.4")]})
+        return await send({"type": "http.response.body", "body": data})
+    if path not in ("/report", "/timeline", "/search"):
+        return await _send_json(send, 404, {"error": "not found"})
+    if method != "POST":
+        return await _send_json(send, 405, {"error": "method not allowed"})
+    if path == "/timeline":
+        try:
+            entries = parse_timeline_request(await _read_body(receive))
+        except BadRequest as e:
+            return await _send_json(send, 400, {"error": str(e)})
+        return await _stream_timeline(send, entries)
+    if path == "/search":
+        try:
+            body = await _read_body(receive)
+            result = await asyncio.get_running_loop().run_in_executor(None, search_pillars, body)
+        except BadRequest as e:
+            return await _send_json(send, 400, {"error": str(e)})
+        return await _send_json(send, 200, result)
+    try:
+        args = parse_request(await _read_body(receive))
+        loop = asyncio.get_running_loop()
+        result, (pid, stats) = await loop.run_in_executor(_get_pool(), _run_report, *args)
+        _worker_stats[pid] = stats
+    except BadRequest as e:
+        return await _send_json(send, 400, {"error": str(e)})
+    await _send_json(send, 200, result)
@@ -2,14 +2,76 @@
 
 import streamlit as st
 import datetime
-import random
 import io
 import base64
-import matplotlib.pyplot as plt
+import collections
+import concurrent.futures
+import contextlib
+import dataclasses
+import functools
+import hashlib
+import html
+import json
+import math
+import os
+import sqlite3
+import struct
+import sys
+import tempfile
+import threading
+import time
+import typing
 import numpy as np
 import streamlit.components.v1 as components
 from korean_lunar_calendar import KoreanLunarCalendar
 
+
+def process_singleton(fn):
+    """인자 없는 팩토리를 프로세스당 1회만 실행하도록 감싼다.
+
+    Streamlit은 rerun마다 스크립트를 다시 실행해 모듈 전역이 새로 만들어지므로, Streamlit
+    런타임 안에서는 st.cache_resource에, 그 밖(API/배치/벤치)에서는 lru_cache에 보관한다.
+    """
+    in_streamlit = st.cache_resource(fn)
+    bare = functools.lru_cache(maxsize=None)(fn)
+
+    @functools.wraps(fn)
+    def wrapper():
+        return in_streamlit() if st.runtime.exists() else bare()
+    return wrapper
+
+
+@process_singleton
+def _process_caches():
+    """함수 이름 -> lru_cache 래퍼. rerun 사이에도 유지되는 메모이즈 저장소."""
+    return {}
+
+
+def process_lru_cache(maxsize):
+    """functools.lru_cache와 같지만 캐시를 process_singleton 저장소에 둔다.
+
+    모듈 전역 lru_cache는 Streamlit rerun마다 새 모듈과 함께 비워지므로, 요청 사이에 유지돼야
+    하는 메모이즈(차트, 운세)는 이 데코레이터를 쓴다. 캐시는 첫 실행 때의 함수로 만들어진다.
+    """
+    def decorator(fn):
+        key = f"{fn.__module__}.{fn.__qualname__}"
+
+        def cached():
+            caches = _process_caches()
+            cache = caches.get(key)
+            if cache is None:
+                cache = caches.setdefault(key, functools.lru_cache(maxsize=maxsize)(fn))
+            return cache
+
+        @functools.wraps(fn)
+        def wrapper(*args):
+            return cached()(*args)
+        wrapper.cache_info = lambda: cached().cache_info()
+        wrapper.cache_clear = lambda: cached().cache_clear()
+        return wrapper
+    return decorator
+
+
 # ==========================================
 # 0. 다국어 설정 (Language Pack)
 # ==========================================
@@ -78,6 +140,129 @@ LANG_PACK = {
     }
 }
 
+# ==========================================
+# 0-1. 단계별 계측 (Stage Metrics)
+# ==========================================
+# SAJU_METRICS=1 이면 프로세스 전체에서 켜지고, 페이지에 ?debug=1 로 접속하면 그 실행(scope)
+# 동안만 켜진다. 꺼져 있을 때 stage()는 공유 nullcontext만 돌려주므로 핫패스 비용이 거의 없다.
+class StageMetrics:
+    """단계별 소요 시간(초)과 순할당 블록 수(sys.getallocatedblocks 차이)를 누적."""
+
+    _NOOP = contextlib.nullcontext()
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled  # 프로세스 전역 스위치
+        self._local = threading.local()  # scope()로 켠 스레드별 스위치
+        self._lock = threading.Lock()
+        self._stats = {}  # stage -> [count, total_sec, max_sec, alloc_blocks]
+
+    def active(self):
+        return self.enabled or getattr(self._local, "on", False)
+
+    @contextlib.contextmanager
+    def scope(self, on=True):
+        """with 블록 동안 현재 스레드에서만 계측을 켠다. 공유 enabled는 건드리지 않는다."""
+        prev = getattr(self._local, "on", False)
+        self._local.on = on
+        try:
+            yield
+        finally:
+            self._local.on = prev
+
+    def bind(self, fn):
+        """현재 스레드의 scope 상태를 다른 스레드(executor)에서 실행될 fn에 넘긴다."""
+        if not getattr(self._local, "on", False):
+            return fn
+
+        def bound(*args, **kwargs):
+            with self.scope():
+                return fn(*args, **kwargs)
+        return bound
+
+    def stage(self, name):
+        return self._measure(name) if self.active() else self._NOOP
+
+    def laps(self):
+        """연속 구간 계측용. lap("이름")을 부를 때마다 직전 lap 이후 구간을 그 이름으로 기록."""
+        if not self.active():
+            return _noop_lap
+        mark = [time.perf_counter(), sys.getallocatedblocks()]
+
+        def lap(name):
+            now, blocks = time.perf_counter(), sys.getallocatedblocks()
+            self._record(name, now - mark[0], blocks - mark[1])
+            mark[0], mark[1] = time.perf_counter(), sys.getallocatedblocks()
+        return lap
+
+    @contextlib.contextmanager
+    def _measure(self, name):
+        blocks0 = sys.getallocatedblocks()
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(name, time.perf_counter() - t0, sys.getallocatedblocks() - blocks0)
+
+    def _record(self, name, elapsed, blocks):
+        with self._lock:
+            stat = self._stats.setdefault(name, [0, 0.0, 0.0, 0])
+            stat[0] += 1
+            stat[1] += elapsed
+            stat[2] = max(stat[2], elapsed)
+            stat[3] += blocks
+
+    def snapshot(self):
+        """{stage: {"count", "total_ms", "avg_ms", "max_ms", "alloc_blocks"}}"""
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._stats.items()]
+        return {k: {"count": c, "total_ms": tot * 1000, "avg_ms": tot * 1000 / c, "max_ms": mx * 1000,
+                    "alloc_blocks": blocks} for k, (c, tot, mx, blocks) in items}
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    @staticmethod
+    def merge(snapshots):
+        """여러 프로세스의 snapshot()을 하나로 합산 (count/total/alloc은 합, max는 최댓값)."""
+        merged = {}
+        for snap in snapshots:
+            for name, s in snap.items():
+                m = merged.setdefault(name, dict.fromkeys(("count", "total_ms", "max_ms", "alloc_blocks"), 0))
+                m["count"] += s["count"]
+                m["total_ms"] += s["total_ms"]
+                m["max_ms"] = max(m["max_ms"], s["max_ms"])
+                m["alloc_blocks"] += s["alloc_blocks"]
+        for m in merged.values():
+            m["avg_ms"] = m["total_ms"] / m["count"]
+        return merged
+
+    def prometheus(self, prefix="saju", snapshot=None):
+        """Prometheus text exposition 형식 덤프. snapshot을 주면 (merge 결과 등) 그것을 덤프.
+        할당 블록은 sys.getallocatedblocks 순증감이라 음수일 수 있으므로 counter가 아닌 gauge."""
+        snap = sorted((self.snapshot() if snapshot is None else snapshot).items())
+        lines = [f"# TYPE {prefix}_stage_seconds summary"]
+        for name, s in snap:
+            lines += [f'{prefix}_stage_seconds_count{{stage="{name}"}} {s["count"]}',
+                      f'{prefix}_stage_seconds_sum{{stage="{name}"}} {s["total_ms"] / 1000:.9f}']
+        lines.append(f"# TYPE {prefix}_stage_seconds_max gauge")
+        lines += [f'{prefix}_stage_seconds_max{{stage="{name}"}} {s["max_ms"] / 1000:.9f}' for name, s in snap]
+        lines.append(f"# TYPE {prefix}_stage_alloc_net_blocks gauge")
+        lines += [f'{prefix}_stage_alloc_net_blocks{{stage="{name}"}} {s["alloc_blocks"]}' for name, s in snap]
+        return "\n".join(lines) + "\n"
+
+
+def _noop_lap(name):
+    pass
+
+
+@process_singleton
+def get_metrics():
+    return StageMetrics(enabled=os.environ.get("SAJU_METRICS", "") not in ("", "0"))
+
+
+METRICS = get_metrics()
+
 # ==========================================
 # 1. 통합 데이터 베이스
 # ==========================================
@@ -101,163 +286,168 @@ class UniversalDB:
             (11, 23, "Sagittarius", "사수자리", "Adventurer"), (12, 25, "Capricorn", "염소자리", "Ambitious")
         ]
 
+# 별자리 조회 테이블: 윤년 기준 day-of-year(0~365) -> zodiac_dates 인덱스
+_MONTH_DOY_OFFSET = (0, 31, 60, 91, 121, 152, 182, 213, 244, 274, 305, 335)
+
+
+def build_zodiac_table(zodiac_dates):
+    """zodiac_dates(시작일 오름차순)로 366칸 테이블 생성. 첫 시작일 이전은 마지막 별자리(염소자리)."""
+    table = []
+    for m, offset in enumerate(_MONTH_DOY_OFFSET, start=1):
+        n_days = (_MONTH_DOY_OFFSET + (366,))[m] - offset
+        for d in range(1, n_days + 1):
+            idx = len(zodiac_dates) - 1
+            for i, (cm, cd, *_) in enumerate(zodiac_dates):
+                if (cm, cd) <= (m, d):
+                    idx = i
+            table.append(idx)
+    return tuple(table)
+
+
+ZODIAC_TABLE = build_zodiac_table(UniversalDB().zodiac_dates)
+ZODIAC_TABLE_NP = np.array(ZODIAC_TABLE, dtype=np.uint8)
+_MONTH_DOY_OFFSET_NP = np.array(_MONTH_DOY_OFFSET, dtype=np.int64)
+
+
+def zodiac_index(m, d):
+    """(월, 일) -> UniversalDB.zodiac_dates 인덱스."""
+    return ZODIAC_TABLE[_MONTH_DOY_OFFSET[m - 1] + d - 1]
+
+
+def zodiac_index_bulk(m, d):
+    """월/일 배열 -> zodiac_dates 인덱스 배열."""
+    return ZODIAC_TABLE_NP[_MONTH_DOY_OFFSET_NP[np.asarray(m) - 1] + np.asarray(d) - 1]
+
 # ==========================================
-# 2. 통합 엔진 (로직)
+# 1-1. 별자리 차트 캐시 (Chart Asset Cache)
 # ==========================================
-class UniversalEngine:
-    def __init__(self):
-        self.db = UniversalDB()
-        self.gan_hanja = ["甲", "乙", "丙", "丁", "戊", "己", "庚", "辛", "壬", "癸"]
-        self.ji_hanja = ["子", "丑", "寅", "卯", "辰", "巳", "午", "未", "申", "酉", "戌", "亥"]
-        self.oh_map = {
-            "목": {"color": "#00C73C", "text": "white"}, "화": {"color": "#FF4444", "text": "white"},
-            "토": {"color": "#E6B800", "text": "black"}, "금": {"color": "#DDDDDD", "text": "black"},
-            "수": {"color": "#333333", "text": "white"}
-        }
-        self.gan_oh = ["목", "목", "화", "화", "토", "토", "금", "금", "수", "수"]
-        self.ji_oh = ["수", "토", "목", "목", "토", "화", "화", "토", "금", "금", "토", "수"]
+# 윤년 포함 (월, 일) 조합은 366개뿐이므로 전부 캐시해도 메모리 부담이 적음
+CHART_CACHE_SIZE = 366
 
-    def get_ganji(self, y, m, d, h):
-        base = datetime.date(1900, 1, 1)
-        target = datetime.date(y, m, d)
-        diff = (target - base).days
-        y_stem = (6 + (y - 1900)) % 10
-        y_branch = (0 + (y - 1900)) % 12
-        m_start = {0: 2, 1: 4, 2: 6, 3: 8, 4: 0, 5: 2, 6: 4, 7: 6, 8: 8, 9: 0}[y_stem]
-        m_stem = (m_start + (m - 2)) % 10
-        m_branch = (m + 1) % 12
-        if m < 2: m_stem = (m_stem + 10) % 10
-        d_stem = (0 + diff) % 10
-        d_branch = (10 + diff) % 12
-        h_branch = (h + 1) // 2 % 12
-        t_start_map = {0: 0, 1: 2, 2: 4, 3: 6, 4: 8, 5: 0, 6: 2, 7: 4, 8: 6, 9: 8}
-        t_start = t_start_map[d_stem]
-        t_stem = (t_start + h_branch) % 10
-        return {"year": (y_stem, y_branch), "month": (m_stem, m_branch), "day": (d_stem, d_branch), "time": (t_stem, h_branch)}
+CHART_LABELS = ("Aries", "Taurus", "Gemini", "Cancer", "Leo", "Virgo",
+                "Libra", "Scorpio", "Sagittarius", "Capricorn", "Aquarius", "Pisces")
 
-    def get_shipsin(self, me, target): 
-        lookup = ["비견", "식상", "재성", "관성", "인성"]
-        me_idx = ["목","화","토","금","수"].index(me)
-        tg_idx = ["목","화","토","금","수"].index(target)
-        diff = (tg_idx - me_idx + 5) % 5
-        return lookup[diff]
 
-    def get_daewoon(self, y_s, m_s, m_b, gender, lang_code):
-        is_yang = y_s % 2 == 0
-        is_man = (gender == '남자' or gender == 'Male')
-        is_fwd = (is_yang and is_man) or (not is_yang and not is_man)
-        curr_s, curr_b, lst = m_s, m_b, []
-        for i in range(1, 10):
-            if is_fwd: curr_s, curr_b = (curr_s + 1) % 10, (curr_b + 1) % 12
-            else: curr_s, curr_b = (curr_s - 1 + 10) % 10, (curr_b - 1 + 12) % 12
-            ji_elem = self.ji_oh[curr_b]
-            lst.append({
-                "age": 4+(i-1)*10, "gan": self.gan_hanja[curr_s], "ji": self.ji_hanja[curr_b], 
-                "bg": self.oh_map[ji_elem]['color'], "tc": self.oh_map[ji_elem]['text']
-            })
-        return lst
+def chart_sun_longitude(m, d):
+    """춘분(3/21) 기준 태양 황경 근사값 (도). 차트 렌더러 공통."""
+    day_of_year = datetime.date(2000, m, d).timetuple().tm_yday
+    vern_equinox = datetime.date(2000, 3, 21).timetuple().tm_yday
+    diff_days = day_of_year - vern_equinox
+    if diff_days < 0: diff_days += 365
+    return diff_days * 0.986
 
-    def get_zodiac_info(self, m, d):
-        dates = self.db.zodiac_dates
-        z_eng, z_kor, z_desc = "Capricorn", "염소자리", "Ambitious"
-        md = m * 100 + d
-        for cm, cd, eng, kor, desc in dates:
-            start_md = cm * 100 + cd
-            idx = dates.index((cm, cd, eng, kor, desc))
-            next_idx = (idx + 1) % 12
-            nm, nd, _, _, _ = dates[next_idx]
-            if eng == "Capricorn":
-                if md >= 1225 or md <= 119:
-                    z_eng, z_kor, z_desc = eng, kor, desc; break
-            else:
-                end_md = nm * 100 + nd
-                if start_md <= md < end_md:
-                    z_eng, z_kor, z_desc = eng, kor, desc; break
-        return z_eng, z_kor, z_desc
 
-    def generate_chart_image(self, target_eng, m, d):
-        day_of_year = datetime.date(2000, m, d).timetuple().tm_yday
-        vern_equinox = datetime.date(2000, 3, 21).timetuple().tm_yday
-        diff_days = day_of_year - vern_equinox
-        if diff_days < 0: diff_days += 365
-        sun_lon = diff_days * 0.986 
-        fig = plt.figure(figsize=(4, 4))
-        ax = fig.add_subplot(111, projection='polar')
-        ax.set_theta_direction(-1)
-        ax.set_theta_zero_location("N")
-        ax.set_ylim(0, 10)
-        ax.set_yticks([])
-        ax.set_xticks(np.deg2rad(np.arange(0, 360, 30)))
-        ax.set_xticklabels([])
-        labels = ["Aries", "Taurus", "Gemini", "Cancer", "Leo", "Virgo", 
-                  "Libra", "Scorpio", "Sagittarius", "Capricorn", "Aquarius", "Pisces"]
-        target_idx = labels.index(target_eng)
-        for i, label in enumerate(labels):
-            angle = np.deg2rad(i * 30 + 15)
-            color = '#9c27b0' if i == target_idx else '#808080'
-            alpha = 0.9 if i == target_idx else 0.15
-            ax.bar(np.deg2rad(i*30 + 15), 10, width=np.deg2rad(30), bottom=0, color=color, alpha=alpha, edgecolor='none')
-            ax.text(angle, 8.5, label[:3], ha='center', va='center', fontsize=9, color='#888', fontweight='bold')
-        sun_angle = np.deg2rad(sun_lon)
-        ax.text(sun_angle, 6, "☉", color='orange', fontsize=20, ha='center', va='center', fontweight='bold')
-        plt.axis('off')
-        img = io.BytesIO()
-        plt.savefig(img, format='png', bbox_inches='tight', transparent=True)
-        img.seek(0)
+@process_lru_cache(maxsize=CHART_CACHE_SIZE)
+def render_chart_png(target_eng, m, d):
+    sun_lon = chart_sun_longitude(m, d)
+    # matplotlib은 import 비용이 커서 첫 렌더링 때만 로드. pyplot 대신 Figure를 직접 써서
+    # 전역 figure 레지스트리/백엔드 상태를 건드리지 않음
+    from matplotlib.figure import Figure
+    fig = Figure(figsize=(4, 4))
+    ax = fig.add_subplot(111, projection='polar')
+    ax.set_theta_direction(-1)
+    ax.set_theta_zero_location("N")
+    ax.set_ylim(0, 10)
+    ax.set_yticks([])
+    ax.set_xticks(np.deg2rad(np.arange(0, 360, 30)))
+    ax.set_xticklabels([])
+    target_idx = CHART_LABELS.index(target_eng)
+    for i, label in enumerate(CHART_LABELS):
+        angle = np.deg2rad(i * 30 + 15)
+        color = '#9c27b0' if i == target_idx else '#808080'
+        alpha = 0.9 if i == target_idx else 0.15
+        ax.bar(np.deg2rad(i*30 + 15), 10, width=np.deg2rad(30), bottom=0, color=color, alpha=alpha, edgecolor='none')
+        ax.text(angle, 8.5, label[:3], ha='center', va='center', fontsize=9, color='#888', fontweight='bold')
+    sun_angle = np.deg2rad(sun_lon)
+    ax.text(sun_angle, 6, "☉", color='orange', fontsize=20, ha='center', va='center', fontweight='bold')
+    ax.axis('off')
+    img = io.BytesIO()
+    with METRICS.stage("chart_rasterize"):
+        fig.savefig(img, format='png', bbox_inches='tight', transparent=True)
+    with METRICS.stage("chart_base64"):
         return base64.b64encode(img.getvalue()).decode()
 
-    def generate_full_report(self, name, gender, y, m, d, h, is_lunar, solar_date_str, lang_code):
-        L = LANG_PACK[lang_code]
-        ganji = self.get_ganji(y, m, d, h)
-        pillars = ["time", "day", "month", "year"]
-        saju_data = []
-        me_oh = self.gan_oh[ganji["day"][0]]
-        
-        # 다국어 십신 변환
-        def trans_ship(ship_kor):
-            return self.db.shipsin_desc.get(ship_kor, ship_kor) if lang_code == "EN" else ship_kor
 
-        for p in pillars:
-            s_idx, b_idx = ganji[p]
-            s_oh, b_oh = self.gan_oh[s_idx], self.ji_oh[b_idx]
-            s_ship = self.get_shipsin(me_oh, s_oh)
-            b_ship = self.get_shipsin(me_oh, b_oh)
-            if p=="day": s_ship="<b>일간(Self)</b>" if lang_code=="EN" else "<b>일간</b>"
-            
-            saju_data.append({
-                "g_c": self.gan_hanja[s_idx], "j_c": self.ji_hanja[b_idx],
-                "g_bg": self.oh_map[s_oh]['color'], "j_bg": self.oh_map[b_oh]['color'],
-                "g_tc": self.oh_map[s_oh]['text'], "j_tc": self.oh_map[b_oh]['text'],
-                "s_s": trans_ship(s_ship), "b_s": trans_ship(b_ship)
-            })
-            
-        daewoon = self.get_daewoon(ganji["year"][0], ganji["month"][0], ganji["month"][1], gender, lang_code)
-        z_eng, z_kor, z_desc = self.get_zodiac_info(m, d)
-        z_display_name = z_kor if lang_code == "KO" else z_eng
-        chart_img = self.generate_chart_image(z_eng, m, d)
-        
-        # 메시지 생성 (다국어 분기)
-        random.seed(int(f"{y}{m}{d}") + datetime.datetime.now().day)
-        s_d_score = random.randint(70, 99)
-        z_d_score = random.randint(60, 100)
-        
-        if lang_code == "KO":
-            s_d_msg = random.choice(["귀인의 도움이 있습니다.", "재물운이 상승합니다.", "건강을 챙기세요.", "뜻밖의 행운이 옵니다."])
-            s_m_msg = random.choice(["이동수가 있는 달입니다.", "안정을 취하면 길합니다.", "새로운 인연이 찾아옵니다."])
-            z_d_msg = random.choice(["직관력이 높아지는 날입니다.", "주변 사람과 대화하세요.", "창의적인 아이디어가 떠오릅니다."])
-            z_m_keyword = random.choice(["사랑", "변화", "성공", "치유", "열정"])
-            z_m_msg = f"이번 달의 키워드는 '{z_m_keyword}'입니다."
-            ai_reading = f"{name}님은 <b>{me_oh}</b> 일간의 기질을 타고났습니다.<br>조화를 이루면 큰 성취가 있을 것입니다."
-        else:
-            s_d_msg = random.choice(["A noble person will help you.", "Wealth luck is rising.", "Watch your health.", "Unexpected luck is coming."])
-            s_m_msg = random.choice(["A month of movement.", "Stability brings luck.", "New relationships arrive."])
-            z_d_msg = random.choice(["Intuition is high today.", "Talk to people around you.", "Creative ideas will flow."])
-            z_m_keyword = random.choice(["Love", "Change", "Success", "Healing", "Passion"])
-            z_m_msg = f"This month's keyword is '{z_m_keyword}'."
-            ai_reading = f"{name} is born with the energy of <b>{me_oh}</b>.<br>Harmony will bring great achievement."
-
-        # CSS 및 HTML 조립 (이전과 동일하되 다국어 변수 적용)
-        style = """
+def _polar(angle_deg, r, c=100):
+    # 북쪽 0도, 시계 방향 (PNG 차트의 theta_zero="N", direction=-1과 동일)
+    a = math.radians(angle_deg)
+    return f"{c + r * math.sin(a):.1f},{c - r * math.cos(a):.1f}"
+
+
+@process_lru_cache(maxsize=CHART_CACHE_SIZE)
+def render_chart_svg(target_eng, m, d):
+    """render_chart_png와 같은 12분할 휠을 SVG 문자열로 (matplotlib 불필요, 약 2KB)."""
+    target_idx = CHART_LABELS.index(target_eng)
+    parts = [('<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 200 200" class="chart-img" '
+              'font-family="sans-serif" font-weight="bold" text-anchor="middle" dominant-baseline="central">')]
+    for i, label in enumerate(CHART_LABELS):
+        fill, opacity = ('#9c27b0', 0.9) if i == target_idx else ('#808080', 0.15)
+        parts.append(f'<path d="M100,100L{_polar(i * 30, 95)}A95,95 0 0 1 {_polar(i * 30 + 30, 95)}Z" '
+                     f'fill="{fill}" fill-opacity="{opacity}"/>')
+    for i, label in enumerate(CHART_LABELS):
+        x, y = _polar(i * 30 + 15, 80).split(",")
+        parts.append(f'<text x="{x}" y="{y}" font-size="9" fill="#888">{label[:3]}</text>')
+    x, y = _polar(chart_sun_longitude(m, d), 57).split(",")
+    parts.append(f'<text x="{x}" y="{y}" font-size="20" fill="orange">☉</text></svg>')
+    return "".join(parts)
+
+
+CHART_RENDERERS = {"png": render_chart_png, "svg": render_chart_svg}
+
+
+def render_chart(target_eng, m, d, fmt="png"):
+    """fmt="png"이면 base64 PNG, "svg"면 SVG 마크업."""
+    try:
+        renderer = CHART_RENDERERS[fmt]
+    except KeyError:
+        raise ValueError(f"unknown chart format: {fmt}") from None
+    return renderer(target_eng, m, d)
+
+
+def warm_chart_cache(fmt="png"):
+    """366개 날짜의 차트를 미리 렌더링해 캐시를 채운다 (배포/기동 시 1회)."""
+    engine = UniversalEngine()
+    for doy in range(366):
+        day = datetime.date(2000, 1, 1) + datetime.timedelta(days=doy)
+        z_eng, _, _ = engine.get_zodiac_info(day.month, day.day)
+        render_chart(z_eng, day.month, day.day, fmt)
+    return CHART_RENDERERS[fmt].cache_info()
+
+# ==========================================
+# 1-2. 리포트 구조체 & 렌더러 (Report / Renderer)
+# ==========================================
+@dataclasses.dataclass(slots=True)
+class Report:
+    """generate_full_report의 계산 결과. 렌더러(html/json/text)에 그대로 전달된다.
+
+    표시 정보(색, HTML 마크업, 십신 번역)는 담지 않는다 -> json/text 출력에 HTML이 섞이지 않음.
+    """
+    name: str
+    lang: str
+    solar_date_str: str
+    me_oh: str
+    saju: list          # [time, day, month, year] 기둥별 dict: stem/branch 인덱스, gan/ji 글자, 오행, 십신 키
+    daewoon: list       # get_daewoon 결과 (age, stem/branch, gan/ji, 지지 오행)
+    ai_reading: str     # 평문 (줄바꿈 \n)
+    s_m_msg: str
+    s_d_msg: str
+    s_d_score: int
+    z_eng: str
+    z_display_name: str
+    z_desc: str
+    chart_img: str      # base64 PNG 또는 SVG (chart_format 참고)
+    z_m_msg: str
+    z_d_msg: str
+    z_d_score: int
+    chart_format: str = "png"  # chart_img 형식: "png"(base64) | "svg"(마크업)
+
+    def to_dict(self):
+        """직렬화용 얕은 dict. dataclasses.asdict의 재귀 deepcopy를 피한다 (내부 값은 공유)."""
+        return {f.name: getattr(self, f.name) for f in dataclasses.fields(self)}
+
+
+# 정적 CSS: 모듈 로드 시 한 번만 만들어 두고, include_style=False로 생략 가능
+REPORT_CSS = """
         <style>
             .container { display: flex; flex-direction: column; width: 100%; gap: 15px; font-family: sans-serif; }
             .panel { width: 100%; border: 1px solid rgba(128, 128, 128, 0.3); border-radius: 12px; background: transparent; padding-bottom:10px; overflow: hidden; color: inherit; }
@@ -275,81 +465,1284 @@ class UniversalEngine:
         </style>
         """
 
-        saju_html = f"""
-        <div class="panel">
-            <div class="hd" style="background:#333;">{L['saju_title']} ({solar_date_str})</div>
-            <div class="s-grid">
-                <div class="s-col">
-                    <span style="font-size:12px; opacity:0.8;">Time</span>
-                    <div class="char" style="background:{saju_data[0]['g_bg']}; color:{saju_data[0]['g_tc']}">{saju_data[0]['g_c']}</div>
-                    <div class="char" style="background:{saju_data[0]['j_bg']}; color:{saju_data[0]['j_tc']}">{saju_data[0]['j_c']}</div>
-                    <span style="font-size:10px;">{saju_data[0]['s_s']}</span>
-                </div>
-                <div class="s-col">
-                    <span style="font-size:12px; opacity:0.8;">Day</span>
-                    <div class="char" style="background:{saju_data[1]['g_bg']}; color:{saju_data[1]['g_tc']}">{saju_data[1]['g_c']}</div>
-                    <div class="char" style="background:{saju_data[1]['j_bg']}; color:{saju_data[1]['j_tc']}">{saju_data[1]['j_c']}</div>
-                    <span style="font-size:10px; color:#2196f3;">{saju_data[1]['s_s']}</span>
-                </div>
+# 템플릿은 모듈 로드 시 한 번 정의하고 str.format으로 채움
+_PILLAR_COL_TPL = """
                 <div class="s-col">
-                    <span style="font-size:12px; opacity:0.8;">Month</span>
-                    <div class="char" style="background:{saju_data[2]['g_bg']}; color:{saju_data[2]['g_tc']}">{saju_data[2]['g_c']}</div>
-                    <div class="char" style="background:{saju_data[2]['j_bg']}; color:{saju_data[2]['j_tc']}">{saju_data[2]['j_c']}</div>
-                    <span style="font-size:10px;">{saju_data[2]['s_s']}</span>
-                </div>
-                <div class="s-col">
-                    <span style="font-size:12px; opacity:0.8;">Year</span>
-                    <div class="char" style="background:{saju_data[3]['g_bg']}; color:{saju_data[3]['g_tc']}">{saju_data[3]['g_c']}</div>
-                    <div class="char" style="background:{saju_data[3]['j_bg']}; color:{saju_data[3]['j_tc']}">{saju_data[3]['j_c']}</div>
-                    <span style="font-size:10px;">{saju_data[3]['s_s']}</span>
-                </div>
-            </div>
-            <div style="padding:8px 12px; font-weight:bold; font-size:14px; background:rgba(128,128,128,0.1);">{L['daewoon_title']}</div>
+                    <span style="font-size:12px; opacity:0.8;">{label}</span>
+                    <div class="char" style="background:{g_bg}; color:{g_tc}">{g_c}</div>
+                    <div class="char" style="background:{j_bg}; color:{j_tc}">{j_c}</div>
+                    <span style="font-size:10px;{ship_style}">{s_s}</span>
+                </div>"""
+
+_DAEWOON_CARD_TPL = "<div class='dw-cd' style='background:{bg}; color:{tc}'><span>{age}</span><span>{gan}{ji}</span></div>"
+
+# 섹션 템플릿: 패널(.panel)은 render_html에서 감싸고, 점진 렌더링 때는 섹션별로 따로 출력
+_PILLARS_TPL = """
+            <div class="hd" style="background:#333;">{saju_title} ({solar_date_str})</div>
+            <div class="s-grid">{pillar_cols}
+            </div>"""
+
+_DAEWOON_TPL = """
+            <div style="padding:8px 12px; font-weight:bold; font-size:14px; background:rgba(128,128,128,0.1);">{daewoon_title}</div>
             <div class="dw-box">
-                {''.join([f"<div class='dw-cd' style='background:{d['bg']}; color:{d['tc']}'><span>{d['age']}</span><span>{d['gan']}{d['ji']}</span></div>" for d in daewoon])}
-            </div>
+                {daewoon_cards}
+            </div>"""
+
+_AI_TPL = """
             <div class="card" style="border-left: 5px solid #333;">
-                <div style="font-weight:bold; font-size:15px; margin-bottom:5px;">{L['ai_title']}</div>
+                <div style="font-weight:bold; font-size:15px; margin-bottom:5px;">{ai_title}</div>
                 <div style="font-size:14px; line-height:1.6;">{ai_reading}</div>
-            </div>
+            </div>"""
+
+_SAJU_FORTUNE_TPL = """
             <div class="card" style="border-left: 5px solid #009688;">
-                <div style="font-weight:bold; font-size:15px;"><span class="tag" style="background:#009688;">Monthly</span>{L['s_monthly']}</div>
+                <div style="font-weight:bold; font-size:15px;"><span class="tag" style="background:#009688;">Monthly</span>{s_monthly}</div>
                 <div style="font-size:14px; margin-top:8px;">{s_m_msg}</div>
             </div>
             <div class="card" style="border-left: 5px solid #ff9800;">
-                <div style="font-weight:bold; font-size:15px;"><span class="tag" style="background:#ff9800;">Daily</span>{L['s_daily']} ({s_d_score} pts)</div>
+                <div style="font-weight:bold; font-size:15px;"><span class="tag" style="background:#ff9800;">Daily</span>{s_daily} ({s_d_score} pts)</div>
                 <div style="font-size:14px; margin-top:8px;">{s_d_msg}</div>
-            </div>
-        </div>
-        """
+            </div>"""
 
-        zodiac_html = f"""
-        <div class="panel">
-            <div class="hd" style="background:#673ab7;">{L['zodiac_title']}</div>
+_ZODIAC_TPL = """
+            <div class="hd" style="background:#673ab7;">{zodiac_title}</div>
             <div class="z-title">{z_display_name}</div>
-            <div style="text-align:center; opacity:0.7; font-size:14px; margin-bottom:10px;">"{z_desc}"</div>
+            <div style="text-align:center; opacity:0.7; font-size:14px; margin-bottom:10px;">"{z_desc}"</div>"""
+
+_CHART_TPL = """
             <div class="chart-box">
-                <img src="data:image/png;base64,{chart_img}" class="chart-img">
-            </div>
+                {chart_tag}
+            </div>"""
+
+_ZODIAC_FORTUNE_TPL = """
             <div class="card" style="border-left: 5px solid #9c27b0;">
-                <div style="font-weight:bold; font-size:15px;"><span class="tag" style="background:#9c27b0;">Monthly</span>{L['z_monthly']}</div>
+                <div style="font-weight:bold; font-size:15px;"><span class="tag" style="background:#9c27b0;">Monthly</span>{z_monthly}</div>
                 <div style="font-size:14px; margin-top:8px;">{z_m_msg}</div>
             </div>
             <div class="card" style="border-left: 5px solid #e91e63;">
-                <div style="font-weight:bold; font-size:15px;"><span class="tag" style="background:#e91e63;">Daily</span>{L['z_daily']} ({z_d_score} pts)</div>
+                <div style="font-weight:bold; font-size:15px;"><span class="tag" style="background:#e91e63;">Daily</span>{z_daily} ({z_d_score} pts)</div>
                 <div style="font-size:14px; margin-top:8px;">{z_d_msg}</div>
-            </div>
+            </div>"""
+
+_PANEL_TPL = """
+        <div class="panel">{body}
         </div>
         """
-        final_html = f"{style}<div class='container'>{saju_html}{zodiac_html}</div>"
-        return final_html
+
+_PILLAR_LABELS = ("Time", "Day", "Month", "Year")
+
+
+_SHIPSIN_EN = UniversalDB().shipsin_desc
+
+
+def _ship_label(ship, lang_code):
+    if ship == "일간":
+        return "<b>일간(Self)</b>" if lang_code == "EN" else "<b>일간</b>"
+    return _SHIPSIN_EN.get(ship, ship) if lang_code == "EN" else ship
+
+
+def _pillar_col(label, col, lang_code):
+    s_color, b_color = OH_MAP[col["stem_oh"]], OH_MAP[col["branch_oh"]]
+    return _PILLAR_COL_TPL.format(
+        label=label, ship_style=" color:#2196f3;" if label == "Day" else "",
+        g_c=col["gan"], j_c=col["ji"], g_bg=s_color["color"], g_tc=s_color["text"],
+        j_bg=b_color["color"], j_tc=b_color["text"], s_s=_ship_label(col["stem_ship"], lang_code))
+
+
+def _section_pillars(report, L):
+    pillar_cols = "".join(_pillar_col(label, col, report.lang) for label, col in zip(_PILLAR_LABELS, report.saju))
+    return _PILLARS_TPL.format(saju_title=L['saju_title'], solar_date_str=report.solar_date_str, pillar_cols=pillar_cols)
+
+
+def _section_daewoon(report, L):
+    return _DAEWOON_TPL.format(daewoon_title=L['daewoon_title'],
+                               daewoon_cards="".join(_DAEWOON_CARD_TPL.format(bg=OH_MAP[dw["oh"]]["color"],
+                                                                              tc=OH_MAP[dw["oh"]]["text"], **dw)
+                                                     for dw in report.daewoon))
+
+
+def _section_ai(report, L):
+    first, second = AI_READING_TPL[report.lang]
+    reading = "<br>".join((first.format(name=html.escape(report.name), me_oh=f"<b>{report.me_oh}</b>"), second))
+    return _AI_TPL.format(ai_title=L['ai_title'], ai_reading=reading)
+
+
+def _section_saju_fortune(report, L):
+    return _SAJU_FORTUNE_TPL.format(s_monthly=L['s_monthly'], s_m_msg=report.s_m_msg,
+                                    s_daily=L['s_daily'], s_d_score=report.s_d_score, s_d_msg=report.s_d_msg)
+
+
+def _section_zodiac(report, L):
+    return _ZODIAC_TPL.format(zodiac_title=L['zodiac_title'], z_display_name=report.z_display_name, z_desc=report.z_desc)
+
+
+def _section_chart(report, L):
+    chart_tag = (report.chart_img if report.chart_format == "svg"
+                 else f'<img src="data:image/png;base64,{report.chart_img}" class="chart-img">')
+    return _CHART_TPL.format(chart_tag=chart_tag)
+
+
+def _section_zodiac_fortune(report, L):
+    return _ZODIAC_FORTUNE_TPL.format(z_monthly=L['z_monthly'], z_m_msg=report.z_m_msg,
+                                      z_daily=L['z_daily'], z_d_score=report.z_d_score, z_d_msg=report.z_d_msg)
+
+
+# (패널, 섹션 이름, 렌더러). 패널 0 = 사주, 1 = 별자리
+REPORT_SECTIONS = (
+    (0, "pillars", _section_pillars),
+    (0, "daewoon", _section_daewoon),
+    (0, "ai", _section_ai),
+    (0, "saju_fortune", _section_saju_fortune),
+    (1, "zodiac", _section_zodiac),
+    (1, "chart", _section_chart),
+    (1, "zodiac_fortune", _section_zodiac_fortune),
+)
+
+
+def render_section(report, name):
+    """섹션 하나의 HTML 조각 (REPORT_CSS는 별도로 한 번 출력해야 함)."""
+    L = LANG_PACK[report.lang]
+    for _, section, renderer in REPORT_SECTIONS:
+        if section == name:
+            return renderer(report, L)
+    raise ValueError(f"unknown report section: {name}")
+
+
+def render_html(report, include_style=True):
+    L = LANG_PACK[report.lang]
+    panels = ["", ""]
+    for panel, _, renderer in REPORT_SECTIONS:
+        panels[panel] += renderer(report, L)
+    body = "".join(_PANEL_TPL.format(body=p) for p in panels)
+    style = REPORT_CSS if include_style else ""
+    return f"{style}<div class='container'>{body}</div>"
+
+
+def render_json(report):
+    return json.dumps(report.to_dict(), ensure_ascii=False)
+
+
+def render_text(report):
+    L = LANG_PACK[report.lang]
+    pillars = "  ".join(f"{label}:{col['gan']}{col['ji']}" for label, col in zip(_PILLAR_LABELS, report.saju))
+    daewoon = " ".join(f"{dw['age']}:{dw['gan']}{dw['ji']}" for dw in report.daewoon)
+    return "\n".join([
+        f"{L['saju_title']} ({report.solar_date_str})", pillars, "",
+        L['daewoon_title'], daewoon, "",
+        L['ai_title'], report.ai_reading, "",
+        f"{L['s_monthly']}: {report.s_m_msg}",
+        f"{L['s_daily']} ({report.s_d_score} pts): {report.s_d_msg}", "",
+        f"{L['zodiac_title']}: {report.z_display_name} \"{report.z_desc}\"",
+        f"{L['z_monthly']}: {report.z_m_msg}",
+        f"{L['z_daily']} ({report.z_d_score} pts): {report.z_d_msg}",
+    ])
+
+
+RENDERERS = {"html": render_html, "json": render_json, "text": render_text}
+
+
+def render_report(report, fmt="html"):
+    try:
+        renderer = RENDERERS[fmt]
+    except KeyError:
+        raise ValueError(f"unknown report format: {fmt}") from None
+    with METRICS.stage(f"render_{fmt}"):
+        return renderer(report)
+
+# ==========================================
+# 1-3. 음력/양력 변환 테이블 (Lunar Table)
+# ==========================================
+# build_lunar_table.py로 미리 만든 바이너리 파일을 mmap으로 읽어 O(1) 변환.
+# 파일이 없으면 to_solar는 KoreanLunarCalendar로 대체 동작한다.
+LUNAR_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "lunar_table.bin")
+LUNAR_TABLE_MAGIC = b"LUNT"
+LUNAR_TABLE_VERSION = 1
+LUNAR_SOLAR_START = datetime.date(1900, 1, 31)  # 음력 1900-01-01
+LUNAR_SOLAR_END = datetime.date(2050, 12, 31)
+# magic, version, 시작 양력 서수, 일수, 시작 음력 연도, 연도 수
+_LUNAR_HEADER = struct.Struct("<4sHxxiiii")
+
+
+def _pack_lunar(ly, lm, ld, leap):
+    return (ly << 10) | (lm << 6) | (leap << 5) | ld
+
+
+class LunarTable:
+    """양력 일 오프셋 <-> 음력 (연, 월, 일, 윤달) 양방향 배열 인덱스.
+
+    solar_to_lunar[i]  : LUNAR_SOLAR_START + i일의 음력 코드 (연<<10 | 월<<6 | 윤<<5 | 일)
+    month_start[k]     : 음력 월 슬롯 k = (연-y0)*24 + (월-1)*2 + 윤 의 1일 오프셋 (-1: 없음)
+    month_len[k]       : 해당 음력 월의 일수
+    """
+
+    def __init__(self, start_ordinal, y0, solar_to_lunar, month_start, month_len):
+        self.start_ordinal = start_ordinal
+        self.y0 = y0
+        self.solar_to_lunar = solar_to_lunar
+        self.month_start = month_start
+        self.month_len = month_len
+
+    @classmethod
+    def build(cls):
+        """KoreanLunarCalendar로 전체 범위를 한 번 훑어 테이블 생성 (약 수 초)."""
+        cal = KoreanLunarCalendar()
+        n_days = (LUNAR_SOLAR_END - LUNAR_SOLAR_START).days + 1
+        y0, n_years = LUNAR_SOLAR_START.year, LUNAR_SOLAR_END.year - LUNAR_SOLAR_START.year + 1
+        s2l = np.zeros(n_days, dtype=np.uint32)
+        month_start = np.full(n_years * 24, -1, dtype=np.int32)
+        month_len = np.zeros(n_years * 24, dtype=np.uint8)
+        for i in range(n_days):
+            day = LUNAR_SOLAR_START + datetime.timedelta(days=i)
+            cal.setSolarDate(day.year, day.month, day.day)
+            ly, lm, ld, leap = cal.lunarYear, cal.lunarMonth, cal.lunarDay, int(cal.isIntercalation)
+            s2l[i] = _pack_lunar(ly, lm, ld, leap)
+            slot = (ly - y0) * 24 + (lm - 1) * 2 + leap
+            if ld == 1:
+                month_start[slot] = i
+            month_len[slot] = max(month_len[slot], ld)
+        return cls(LUNAR_SOLAR_START.toordinal(), y0, s2l, month_start, month_len)
+
+    def save(self, path=LUNAR_TABLE_PATH):
+        with open(path, "wb") as f:
+            f.write(_LUNAR_HEADER.pack(LUNAR_TABLE_MAGIC, LUNAR_TABLE_VERSION, self.start_ordinal,
+                                       len(self.solar_to_lunar), self.y0, len(self.month_start) // 24))
+            f.writelines(np.ascontiguousarray(arr).tobytes()
+                         for arr in (self.solar_to_lunar, self.month_start, self.month_len))
+
+    @classmethod
+    def load(cls, path=LUNAR_TABLE_PATH):
+        buf = np.memmap(path, dtype=np.uint8, mode="r")
+        magic, version, start_ordinal, n_days, y0, n_years = _LUNAR_HEADER.unpack_from(buf, 0)
+        if magic != LUNAR_TABLE_MAGIC or version != LUNAR_TABLE_VERSION:
+            raise ValueError(f"unsupported lunar table: {path}")
+        off = _LUNAR_HEADER.size
+        s2l = np.frombuffer(buf, dtype=np.uint32, count=n_days, offset=off)
+        off += s2l.nbytes
+        month_start = np.frombuffer(buf, dtype=np.int32, count=n_years * 24, offset=off)
+        off += month_start.nbytes
+        month_len = np.frombuffer(buf, dtype=np.uint8, count=n_years * 24, offset=off)
+        return cls(start_ordinal, y0, s2l, month_start, month_len)
+
+    def lunar_to_solar(self, ly, lm, ld, leap=False):
+        """음력 -> 양력 datetime.date. 범위 밖/존재하지 않는 날짜는 ValueError."""
+        slot = (ly - self.y0) * 24 + (lm - 1) * 2 + int(leap)
+        if not (1 <= lm <= 12 and 0 <= slot < len(self.month_start)) or self.month_start[slot] < 0 \
+                or not 1 <= ld <= self.month_len[slot]:
+            raise ValueError(f"invalid lunar date: {ly}-{lm}-{ld} (leap={leap})")
+        return datetime.date.fromordinal(self.start_ordinal + int(self.month_start[slot]) + ld - 1)
+
+    def solar_to_lunar_date(self, y, m, d):
+        """양력 -> (음력 연, 월, 일, 윤달 여부)."""
+        i = datetime.date(y, m, d).toordinal() - self.start_ordinal
+        if not 0 <= i < len(self.solar_to_lunar):
+            raise ValueError(f"solar date out of range: {y}-{m}-{d}")
+        code = int(self.solar_to_lunar[i])
+        return code >> 10, (code >> 6) & 0xF, code & 0x1F, bool(code & 0x20)
+
+    def lunar_to_solar_bulk(self, ly, lm, ld, leap):
+        """배열 단위 음력 -> 양력 (y, m, d) 배열. 잘못된 날짜는 ValueError."""
+        ly, lm, ld = (np.asarray(a, dtype=np.int64) for a in (ly, lm, ld))
+        slot = (ly - self.y0) * 24 + (lm - 1) * 2 + np.asarray(leap, dtype=np.int64)
+        ok = (lm >= 1) & (lm <= 12) & (slot >= 0) & (slot < len(self.month_start))
+        slot_c = np.where(ok, slot, 0)
+        start = self.month_start[slot_c]
+        ok &= (start >= 0) & (ld >= 1) & (ld <= self.month_len[slot_c])
+        if not ok.all():
+            raise ValueError(f"{int((~ok).sum())} invalid lunar dates")
+        dates = np.datetime64(datetime.date.fromordinal(self.start_ordinal), "D") + (start + ld - 1).astype("timedelta64[D]")
+        return _split_datetime64(dates)
+
+    def solar_to_lunar_bulk(self, y, m, d):
+        """배열 단위 양력 -> 음력 (연, 월, 일, 윤달) 배열."""
+        i = days_since_1900(y, m, d) - (self.start_ordinal - datetime.date(1900, 1, 1).toordinal())
+        if ((i < 0) | (i >= len(self.solar_to_lunar))).any():
+            raise ValueError("solar date out of range")
+        code = self.solar_to_lunar[i]
+        return code >> 10, (code >> 6) & 0xF, code & 0x1F, (code & 0x20).astype(bool)
+
+
+def _split_datetime64(dates):
+    y = dates.astype("datetime64[Y]").astype(np.int64) + 1970
+    m = dates.astype("datetime64[M]").astype(np.int64) % 12 + 1
+    d = (dates - dates.astype("datetime64[M]")).astype(np.int64) + 1
+    return y, m, d
+
+
+@process_singleton
+def get_lunar_table():
+    """mmap된 LunarTable (프로세스당 1회 로드). 파일이 없으면 None."""
+    if os.path.exists(LUNAR_TABLE_PATH):
+        return LunarTable.load()
+    return None
+
+# ==========================================
+# 1-4. 운세 메시지 생성기 (Fortune)
+# ==========================================
+# 전역 random 모듈을 재시드하지 않고, (생년월일, 날짜, 언어)의 해시에서 값을 뽑는다.
+# 같은 입력이면 항상 같은 결과 -> 메모이즈/사전 계산 가능.
+FORTUNE_MSGS = {
+    "KO": {
+        "s_d": ("귀인의 도움이 있습니다.", "재물운이 상승합니다.", "건강을 챙기세요.", "뜻밖의 행운이 옵니다."),
+        "s_m": ("이동수가 있는 달입니다.", "안정을 취하면 길합니다.", "새로운 인연이 찾아옵니다."),
+        "z_d": ("직관력이 높아지는 날입니다.", "주변 사람과 대화하세요.", "창의적인 아이디어가 떠오릅니다."),
+        "z_m": tuple(f"이번 달의 키워드는 '{k}'입니다." for k in ("사랑", "변화", "성공", "치유", "열정")),
+    },
+    "EN": {
+        "s_d": ("A noble person will help you.", "Wealth luck is rising.", "Watch your health.", "Unexpected luck is coming."),
+        "s_m": ("A month of movement.", "Stability brings luck.", "New relationships arrive."),
+        "z_d": ("Intuition is high today.", "Talk to people around you.", "Creative ideas will flow."),
+        "z_m": tuple(f"This month's keyword is '{k}'." for k in ("Love", "Change", "Success", "Healing", "Passion")),
+    },
+}
+# 하루치 사전 계산 대상: 최근 100년(36,525일) 생년월일 x 언어 수, 오늘/내일 2일분
+FORTUNE_BIRTH_DAYS = 36525
+FORTUNE_CACHE_SIZE = FORTUNE_BIRTH_DAYS * len(FORTUNE_MSGS) * 2
+# 자정 이 시간 전에 내일 운세를 미리 계산 (1회 약 0.5초)
+FORTUNE_PRECOMPUTE_LEAD = datetime.timedelta(minutes=10)
+
+
+class Fortune(typing.NamedTuple):
+    s_d_score: int
+    s_d_msg: str
+    s_m_msg: str
+    z_d_score: int
+    z_d_msg: str
+    z_m_msg: str
+
+
+def _fortune_digest(y, m, d, period, lang_code):
+    return hashlib.blake2b(f"{y:04d}{m:02d}{d:02d}|{period}|{lang_code}".encode(), digest_size=8).digest()
+
+
+@process_lru_cache(maxsize=FORTUNE_CACHE_SIZE)
+def get_fortune(y, m, d, day, lang_code):
+    """생년월일 (y, m, d)의 day(datetime.date) 운세. 월간 메시지는 같은 달 동안 고정."""
+    msgs = FORTUNE_MSGS[lang_code]
+    dh = _fortune_digest(y, m, d, day.isoformat(), lang_code)
+    mh = _fortune_digest(y, m, d, f"{day.year:04d}-{day.month:02d}", lang_code)
+    return Fortune(
+        s_d_score=70 + int.from_bytes(dh[0:2], "little") % 30,
+        s_d_msg=msgs["s_d"][dh[2] % len(msgs["s_d"])],
+        s_m_msg=msgs["s_m"][mh[0] % len(msgs["s_m"])],
+        z_d_score=60 + int.from_bytes(dh[3:5], "little") % 41,
+        z_d_msg=msgs["z_d"][dh[5] % len(msgs["z_d"])],
+        z_m_msg=msgs["z_m"][mh[1] % len(msgs["z_m"])],
+    )
+
+
+AI_READING_TPL = {
+    "KO": ("{name}님은 {me_oh} 일간의 기질을 타고났습니다.", "조화를 이루면 큰 성취가 있을 것입니다."),
+    "EN": ("{name} is born with the energy of {me_oh}.", "Harmony will bring great achievement."),
+}
+
+
+def ai_reading_text(name, me_oh, lang_code):
+    """AI 해설 평문 (줄바꿈은 \n). HTML 강조/줄바꿈은 render_html에서."""
+    return "\n".join(AI_READING_TPL[lang_code]).format(name=name, me_oh=me_oh)
+
+
+def precompute_fortunes(day, langs=tuple(FORTUNE_MSGS), birth_days=FORTUNE_BIRTH_DAYS):
+    """day의 운세를 직전 birth_days일의 모든 생년월일에 대해 미리 계산해 캐시에 올린다.
+
+    자정 전 롤오버 작업에서 precompute_fortunes(내일)로 호출. 반환: 계산한 항목 수.
+    """
+    count = 0
+    for i in range(birth_days):
+        b = day - datetime.timedelta(days=i)
+        for lang_code in langs:
+            get_fortune(b.year, b.month, b.day, day, lang_code)
+            count += 1
+    return count
+
+
+@process_singleton
+def start_fortune_rollover():
+    """프로세스당 1회: 매일 자정 FORTUNE_PRECOMPUTE_LEAD 전에 내일 운세를 precompute_fortunes로
+    미리 계산하는 데몬 스레드를 띄운다 (오늘 것은 요청 시 메모이즈). Streamlit main()과 API 워커가 호출."""
+    def loop():
+        while True:
+            tomorrow = datetime.date.today() + datetime.timedelta(days=1)
+            midnight = datetime.datetime.combine(tomorrow, datetime.time())
+            time.sleep(max(0.0, (midnight - FORTUNE_PRECOMPUTE_LEAD - datetime.datetime.now()).total_seconds()))
+            precompute_fortunes(tomorrow)
+            time.sleep(max(0.0, (midnight - datetime.datetime.now()).total_seconds()) + 1)
+
+    thread = threading.Thread(target=loop, name="saju-fortune-rollover", daemon=True)
+    thread.start()
+    return thread
+
+# ==========================================
+# 1-5. 만세력 테이블 (Manse Table)
+# ==========================================
+# build_manse_table.py로 계산한 1900~2100년 24절기 시각(KST, 분 단위)과 그로부터 만든
+# 일별 연주/월주를 mmap으로 읽어 O(1) 조회. 범위 밖이거나 파일이 없으면 절입일 근사로 대체.
+MANSE_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "manse_table.bin")
+MANSE_TABLE_MAGIC = b"MANS"
+MANSE_TABLE_VERSION = 1
+MANSE_START = datetime.date(1900, 1, 1)
+MANSE_END = datetime.date(2100, 12, 31)
+# 태양 황경 285°(소한)부터 15°씩. 짝수 인덱스가 월이 바뀌는 절(節), 2번(입춘)에서 해가 바뀐다
+SOLAR_TERM_NAMES = ("소한", "대한", "입춘", "우수", "경칩", "춘분", "청명", "곡우", "입하", "소만", "망종", "하지",
+                    "소서", "대서", "입추", "처서", "백로", "추분", "한로", "상강", "입동", "소설", "대설", "동지")
+# 양력 월별 절입일 근사 (1월 소한 ~ 12월 대설). 테이블이 없을 때만 사용
+JIE_APPROX_DAY = np.array([6, 4, 6, 5, 6, 6, 7, 8, 8, 8, 7, 7])
+MANSE_NO_SWITCH = 24 * 60
+# magic, version, 시작 양력 서수, 일수, 첫 절기 연도, 연도 수
+_MANSE_HEADER = struct.Struct("<4sHxxiiii")
+
+
+def ganji_index(stem, branch):
+    """(천간, 지지) -> 60갑자 인덱스 (甲子=0). 인덱스 % 10, % 12가 다시 천간, 지지."""
+    return (6 * stem - 5 * branch) % 60
+
+
+def approx_pillars(y, m, d):
+    """절입일 근사(JIE_APPROX_DAY)로 구한 (연주, 월주) 60갑자 인덱스. 스칼라/배열 모두 가능.
+
+    절입일 당일은 시각과 무관하게 새 달로 보므로 경계 하루 안팎은 틀릴 수 있다.
+    """
+    # 절월 번호: 양력 (연, 월)에 그 달 절입 전이면 한 달 앞으로. 1900-02(戊寅월) = 14
+    k = np.asarray(y) * 12 + np.asarray(m) - 1 - (np.asarray(d) < JIE_APPROX_DAY[np.asarray(m) - 1])
+    return ((k - 1) // 12 - 4) % 60, (k - 22787) % 60
+
+
+class ManseTable:
+    """24절기 시각과 일 오프셋 -> 그날 0시(KST)의 연주/월주 배열.
+
+    terms[k]      : (y0 + k // 24)년 SOLAR_TERM_NAMES[k % 24]의 시각, MANSE_START 0시(KST)부터의 분
+    switch_min[i] : MANSE_START + i일에 절(節)이 드는 시각(그날 0시부터의 분, 없으면 MANSE_NO_SWITCH).
+                    이 시각부터 월주 +1, 새 월지가 寅(입춘)이면 연주도 +1
+    year_gz[i]    : 그날 0시의 연주 60갑자 인덱스
+    month_gz[i]   : 그날 0시의 월주 60갑자 인덱스
+    """
+
+    def __init__(self, start_ordinal, y0, terms, switch_min, year_gz, month_gz):
+        self.start_ordinal = start_ordinal
+        self.y0 = y0
+        self.terms = terms
+        self.switch_min = switch_min
+        self.year_gz = year_gz
+        self.month_gz = month_gz
+
+    @classmethod
+    def build(cls, terms):
+        """절기 시각 배열(build_manse_table.py에서 계산)로 일별 연주/월주 배열 생성."""
+        terms = np.asarray(terms, dtype=np.int32)
+        n_days = (MANSE_END - MANSE_START).days + 1
+        day_start = np.arange(n_days, dtype=np.int64) * 1440
+        jie = terms[0::2].astype(np.int64)
+        # MANSE_START는 첫 절기(소한) 전이라 근사 규칙이 정확하다. 이후는 지나간 절/입춘 수만큼 전진
+        y_gz0, m_gz0 = approx_pillars(MANSE_START.year, MANSE_START.month, MANSE_START.day)
+        month_gz = (m_gz0 + np.searchsorted(jie, day_start, side="right")) % 60
+        year_gz = (y_gz0 + np.searchsorted(jie[1::12], day_start, side="right")) % 60
+        switch_min = np.full(n_days, MANSE_NO_SWITCH, dtype=np.uint16)
+        inside = (jie < n_days * 1440) & (jie % 1440 > 0)  # 정각 0시 절입은 이미 그날 0시 값에 반영
+        switch_min[jie[inside] // 1440] = jie[inside] % 1440
+        return cls(MANSE_START.toordinal(), MANSE_START.year, terms, switch_min,
+                   year_gz.astype(np.uint8), month_gz.astype(np.uint8))
+
+    def save(self, path=MANSE_TABLE_PATH):
+        with open(path, "wb") as f:
+            f.write(_MANSE_HEADER.pack(MANSE_TABLE_MAGIC, MANSE_TABLE_VERSION, self.start_ordinal,
+                                       len(self.switch_min), self.y0, len(self.terms) // 24))
+            f.writelines(np.ascontiguousarray(arr).tobytes()
+                         for arr in (self.terms, self.switch_min, self.year_gz, self.month_gz))
+
+    @classmethod
+    def load(cls, path=MANSE_TABLE_PATH):
+        buf = np.memmap(path, dtype=np.uint8, mode="r")
+        magic, version, start_ordinal, n_days, y0, n_years = _MANSE_HEADER.unpack_from(buf, 0)
+        if magic != MANSE_TABLE_MAGIC or version != MANSE_TABLE_VERSION:
+            raise ValueError(f"unsupported manse table: {path}")
+        off = _MANSE_HEADER.size
+        terms = np.frombuffer(buf, dtype=np.int32, count=n_years * 24, offset=off)
+        off += terms.nbytes
+        switch_min = np.frombuffer(buf, dtype=np.uint16, count=n_days, offset=off)
+        off += switch_min.nbytes
+        year_gz = np.frombuffer(buf, dtype=np.uint8, count=n_days, offset=off)
+        month_gz = np.frombuffer(buf, dtype=np.uint8, count=n_days, offset=off + n_days)
+        return cls(start_ordinal, y0, terms, switch_min, year_gz, month_gz)
+
+    def contains(self, y, m, d):
+        return 0 <= datetime.date(y, m, d).toordinal() - self.start_ordinal < len(self.switch_min)
+
+    def pillars(self, y, m, d, h=0, mi=0):
+        """양력 (y, m, d) h시 mi분(KST)의 (연주, 월주) 60갑자 인덱스. 범위 밖은 ValueError."""
+        i = datetime.date(y, m, d).toordinal() - self.start_ordinal
+        if not 0 <= i < len(self.switch_min):
+            raise ValueError(f"solar date out of range: {y}-{m}-{d}")
+        y_gz, m_gz = int(self.year_gz[i]), int(self.month_gz[i])
+        if h * 60 + mi >= self.switch_min[i]:
+            m_gz = (m_gz + 1) % 60
+            if m_gz % 12 == 2:
+                y_gz = (y_gz + 1) % 60
+        return y_gz, m_gz
+
+    def pillars_bulk(self, y, m, d, h=0, mi=0):
+        """pillars()의 배열 버전. 반환: (연주, 월주) 60갑자 인덱스 배열."""
+        i = days_since_1900(y, m, d) - (self.start_ordinal - BASE_ORDINAL)
+        if ((i < 0) | (i >= len(self.switch_min))).any():
+            raise ValueError("solar date out of range")
+        after = np.asarray(h, dtype=np.int64) * 60 + np.asarray(mi, dtype=np.int64) >= self.switch_min[i]
+        m_gz = (self.month_gz[i].astype(np.int64) + after) % 60
+        y_gz = (self.year_gz[i].astype(np.int64) + (after & (m_gz % 12 == 2))) % 60
+        return y_gz, m_gz
+
+    def solar_terms(self, year):
+        """year년 24절기 [(이름, KST datetime), ...]."""
+        k = (year - self.y0) * 24
+        if not 0 <= k < len(self.terms):
+            raise ValueError(f"year out of range: {year}")
+        start = datetime.datetime.combine(datetime.date.fromordinal(self.start_ordinal), datetime.time())
+        return [(name, start + datetime.timedelta(minutes=int(t)))
+                for name, t in zip(SOLAR_TERM_NAMES, self.terms[k:k + 24])]
+
+
+@process_singleton
+def get_manse_table():
+    """mmap된 ManseTable (프로세스당 1회 로드). 파일이 없으면 None."""
+    if os.path.exists(MANSE_TABLE_PATH):
+        return ManseTable.load()
+    return None
+
+
+def year_month_pillars(y, m, d, h=0, mi=0):
+    """(연주, 월주) 60갑자 인덱스. 만세력 테이블 범위 안이면 절입 시각(분) 기준, 아니면 절입일 근사."""
+    table = get_manse_table()
+    if table is not None and table.contains(y, m, d):
+        return table.pillars(y, m, d, h, mi)
+    y_gz, m_gz = approx_pillars(y, m, d)
+    return int(y_gz), int(m_gz)
+
+
+def year_month_pillars_bulk(y, m, d, h=0, mi=0):
+    """year_month_pillars()의 배열 버전. 테이블 범위 밖 원소만 근사로 채운다."""
+    y, m, d = (np.asarray(a, dtype=np.int64) for a in (y, m, d))
+    y_gz, m_gz = approx_pillars(y, m, d)
+    table = get_manse_table()
+    if table is None:
+        return y_gz, m_gz
+    i = days_since_1900(y, m, d) - (table.start_ordinal - BASE_ORDINAL)
+    inside = (i >= 0) & (i < len(table.switch_min))
+    if inside.all():
+        return table.pillars_bulk(y, m, d, h, mi)
+    h, mi = np.broadcast_to(h, y.shape), np.broadcast_to(mi, y.shape)
+    y_gz[inside], m_gz[inside] = table.pillars_bulk(y[inside], m[inside], d[inside], h[inside], mi[inside])
+    return y_gz, m_gz
+
+# ==========================================
+# 2. 통합 엔진 (로직)
+# ==========================================
+GAN_HANJA = ("甲", "乙", "丙", "丁", "戊", "己", "庚", "辛", "壬", "癸")
+JI_HANJA = ("子", "丑", "寅", "卯", "辰", "巳", "午", "未", "申", "酉", "戌", "亥")
+OH_MAP = {
+    "목": {"color": "#00C73C", "text": "white"}, "화": {"color": "#FF4444", "text": "white"},
+    "토": {"color": "#E6B800", "text": "black"}, "금": {"color": "#DDDDDD", "text": "black"},
+    "수": {"color": "#333333", "text": "white"}
+}
+GAN_OH = ("목", "목", "화", "화", "토", "토", "금", "금", "수", "수")
+JI_OH = ("수", "토", "목", "목", "토", "화", "화", "토", "금", "금", "토", "수")
+SHIPSIN_NAMES = ("비견", "식상", "재성", "관성", "인성")
+OH_NAMES = ("목", "화", "토", "금", "수")
+# 미리 계산한 조회표: (일간 오행, 대상 오행) -> 십신, 연간 -> 인월 천간, 일간 -> 자시 천간
+SHIPSIN_BY_OH = {(me, tg): SHIPSIN_NAMES[(j - i) % 5] for i, me in enumerate(OH_NAMES) for j, tg in enumerate(OH_NAMES)}
+M_START = (2, 4, 6, 8, 0, 2, 4, 6, 8, 0)
+T_START = (0, 2, 4, 6, 8, 0, 2, 4, 6, 8)
+BASE_ORDINAL = datetime.date(1900, 1, 1).toordinal()
+
+
+class UniversalEngine:
+    def __init__(self):
+        self.db = UniversalDB()
+        self.gan_hanja = GAN_HANJA
+        self.ji_hanja = JI_HANJA
+        self.oh_map = OH_MAP
+        self.gan_oh = GAN_OH
+        self.ji_oh = JI_OH
+
+    def get_ganji(self, y, m, d, h, mi=0):
+        """양력 y-m-d h시 mi분(KST)의 사주 네 기둥. 연주/월주는 절입 시각 기준 (year_month_pillars)."""
+        diff = datetime.date(y, m, d).toordinal() - BASE_ORDINAL
+        y_gz, m_gz = year_month_pillars(y, m, d, h, mi)
+        y_stem, y_branch = y_gz % 10, y_gz % 12
+        m_stem, m_branch = m_gz % 10, m_gz % 12
+        d_stem = diff % 10
+        d_branch = (10 + diff) % 12
+        h_branch = (h + 1) // 2 % 12
+        t_stem = (T_START[d_stem] + h_branch) % 10
+        return {"year": (y_stem, y_branch), "month": (m_stem, m_branch), "day": (d_stem, d_branch), "time": (t_stem, h_branch)}
+
+    def get_shipsin(self, me, target):
+        return SHIPSIN_BY_OH[(me, target)]
+
+    def get_daewoon(self, y_s, m_s, m_b, gender, lang_code):
+        is_yang = y_s % 2 == 0
+        is_man = (gender == '남자' or gender == 'Male')
+        is_fwd = (is_yang and is_man) or (not is_yang and not is_man)
+        curr_s, curr_b, lst = m_s, m_b, []
+        for i in range(1, 10):
+            if is_fwd: curr_s, curr_b = (curr_s + 1) % 10, (curr_b + 1) % 12
+            else: curr_s, curr_b = (curr_s - 1 + 10) % 10, (curr_b - 1 + 12) % 12
+            lst.append({
+                "age": 4+(i-1)*10, "stem": curr_s, "branch": curr_b,
+                "gan": self.gan_hanja[curr_s], "ji": self.ji_hanja[curr_b], "oh": self.ji_oh[curr_b]
+            })
+        return lst
+
+    def get_zodiac_info(self, m, d):
+        _, _, z_eng, z_kor, z_desc = self.db.zodiac_dates[zodiac_index(m, d)]
+        return z_eng, z_kor, z_desc
+
+    def generate_chart_image(self, target_eng, m, d, fmt="png"):
+        # 차트는 (별자리, 월, 일)에만 의존하므로 최대 366장 -> 캐시 조회
+        return render_chart(target_eng, m, d, fmt)
+
+    def build_report(self, name, gender, y, m, d, h, is_lunar, solar_date_str, lang_code, day=None, with_chart=True,
+                     chart_format="png", mi=0):
+        """계산 + 메시지 생성만 수행하고 렌더링 전의 Report를 반환.
+
+        day: 운세 기준일 (기본 오늘), with_chart=False면 차트 렌더링을 생략 (chart_img=""),
+        chart_format: "png" | "svg", mi: 출생 분 (절입일 경계 판정용)
+        """
+        lap = METRICS.laps()
+        ganji = self.get_ganji(y, m, d, h, mi)
+        pillars = ["time", "day", "month", "year"]
+        saju_data = []
+        me_oh = self.gan_oh[ganji["day"][0]]
+
+        # 표시용 색/마크업/번역은 렌더러에서. 여기서는 인덱스, 오행, 십신 키(한글)만 담는다
+        for p in pillars:
+            s_idx, b_idx = ganji[p]
+            s_oh, b_oh = self.gan_oh[s_idx], self.ji_oh[b_idx]
+            saju_data.append({
+                "stem": s_idx, "branch": b_idx, "gan": self.gan_hanja[s_idx], "ji": self.ji_hanja[b_idx],
+                "stem_oh": s_oh, "branch_oh": b_oh,
+                "stem_ship": "일간" if p == "day" else self.get_shipsin(me_oh, s_oh),
+                "branch_ship": self.get_shipsin(me_oh, b_oh),
+            })
+        lap("pillars")
+            
+        daewoon = self.get_daewoon(ganji["year"][0], ganji["month"][0], ganji["month"][1], gender, lang_code)
+        lap("daewoon")
+        z_eng, z_kor, z_desc = self.get_zodiac_info(m, d)
+        z_display_name = z_kor if lang_code == "KO" else z_eng
+        lap("zodiac")
+        chart_img = self.generate_chart_image(z_eng, m, d, chart_format) if with_chart else ""
+        lap("chart")
+        
+        # 메시지 생성 (다국어 분기)
+        fortune = get_fortune(y, m, d, day or datetime.date.today(), lang_code)
+        report = Report(
+            name=name, lang=lang_code, solar_date_str=solar_date_str, me_oh=me_oh,
+            saju=saju_data, daewoon=daewoon, ai_reading=ai_reading_text(name, me_oh, lang_code),
+            s_m_msg=fortune.s_m_msg, s_d_msg=fortune.s_d_msg, s_d_score=fortune.s_d_score,
+            z_eng=z_eng, z_display_name=z_display_name, z_desc=z_desc, chart_img=chart_img,
+            z_m_msg=fortune.z_m_msg, z_d_msg=fortune.z_d_msg, z_d_score=fortune.z_d_score,
+            chart_format=chart_format,
+        )
+        lap("fortune")
+        return report
+
+    def generate_full_report(self, name, gender, y, m, d, h, is_lunar, solar_date_str, lang_code, fmt="html", day=None,
+                             chart_format="png", mi=0):
+        with METRICS.stage("report_total"):
+            report = self.build_report(name, gender, y, m, d, h, is_lunar, solar_date_str, lang_code, day,
+                                       chart_format=chart_format, mi=mi)
+            return render_report(report, fmt)
+
+@process_singleton
+def get_section_executor():
+    """점진 렌더링에서 무거운 섹션(차트)을 그리는 공용 스레드 풀."""
+    return concurrent.futures.ThreadPoolExecutor(max_workers=2, thread_name_prefix="saju-section")
+
+
+@process_singleton
+def get_engine():
+    """프로세스 공용 UniversalEngine. 엔진은 조회표만 들고 있어 세션 간 공유해도 안전."""
+    return UniversalEngine()
+
+# ==========================================
+# 2-1. 배치 엔진 (NumPy 벡터 연산)
+# ==========================================
+# 스칼라 엔진과 동일한 규칙을 배열 산술로 옮긴 것. 인덱스는 gan_hanja/ji_hanja 기준.
+GAN_OH_IDX = np.array([0, 0, 1, 1, 2, 2, 3, 3, 4, 4], dtype=np.int8)
+JI_OH_IDX = np.array([4, 2, 0, 0, 2, 1, 1, 2, 3, 3, 2, 4], dtype=np.int8)
+DAEWOON_STEPS = 9
+
+
+def days_since_1900(y, m, d):
+    """그레고리력 (y, m, d) 배열 -> 1900-01-01 기준 경과 일수 (days-from-civil)."""
+    y = np.asarray(y, dtype=np.int64)
+    m = np.asarray(m, dtype=np.int64)
+    d = np.asarray(d, dtype=np.int64)
+    y = y - (m <= 2)
+    era = y // 400
+    yoe = y - era * 400
+    doy = (153 * (m + np.where(m > 2, -3, 9)) + 2) // 5 + d - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    # 719468: 0000-03-01 -> 1970-01-01, 25567: 1900-01-01 -> 1970-01-01
+    return era * 146097 + doe - 719468 + 25567
+
+
+class BatchEngine:
+    """UniversalEngine의 get_ganji/get_shipsin/get_daewoon을 배열 단위로 계산."""
+
+    def get_ganji(self, y, m, d, h, mi=0):
+        h = np.asarray(h, dtype=np.int64)
+        diff = days_since_1900(y, m, d)
+        y_gz, m_gz = year_month_pillars_bulk(y, m, d, h, mi)
+        y_stem, y_branch = y_gz % 10, y_gz % 12
+        m_stem, m_branch = m_gz % 10, m_gz % 12
+        d_stem = diff % 10
+        d_branch = (10 + diff) % 12
+        h_branch = (h + 1) // 2 % 12
+        t_stem = (2 * d_stem + h_branch) % 10
+        return {"year": (y_stem, y_branch), "month": (m_stem, m_branch),
+                "day": (d_stem, d_branch), "time": (t_stem, h_branch)}
+
+    def get_shipsin(self, me_oh, target_oh):
+        """오행 인덱스 배열 -> 십신 코드 배열 (SHIPSIN_NAMES 인덱스)."""
+        return (np.asarray(target_oh) - np.asarray(me_oh) + 5) % 5
+
+    def get_shipsin_codes(self, ganji):
+        """일간 기준 각 기둥 천간/지지의 십신 코드. 반환: {"time": (stem, branch), ...}"""
+        me_oh = GAN_OH_IDX[ganji["day"][0]]
+        return {p: (self.get_shipsin(me_oh, GAN_OH_IDX[s]), self.get_shipsin(me_oh, JI_OH_IDX[b]))
+                for p, (s, b) in ganji.items()}
+
+    def get_daewoon(self, y_s, m_s, m_b, is_male):
+        """대운 9단계의 (천간, 지지) 인덱스 배열, 각각 shape (N, 9). is_male: bool 배열."""
+        y_s = np.asarray(y_s)
+        is_yang = y_s % 2 == 0
+        step = np.where(is_yang == np.asarray(is_male, dtype=bool), 1, -1)
+        offs = step[..., None] * np.arange(1, DAEWOON_STEPS + 1)
+        stems = (np.asarray(m_s)[..., None] + offs) % 10
+        branches = (np.asarray(m_b)[..., None] + offs) % 12
+        return stems, branches
+
+    def run(self, y, m, d, h, is_male):
+        ganji = self.get_ganji(y, m, d, h)
+        shipsin = self.get_shipsin_codes(ganji)
+        daewoon = self.get_daewoon(ganji["year"][0], ganji["month"][0], ganji["month"][1], is_male)
+        return ganji, shipsin, daewoon
+
+
+# ==========================================
+# 2-2. 리포트 캐시 (프로세스 LRU + 공유 SQLite)
+# ==========================================
+# 키: (양력 생년월일, 시지, 성별, 언어, 운세 기준일, 표시용 날짜). 이름은 키에서 빼고
+# 조회 후 name/ai_reading만 다시 채운다. 운세 기준일이 바뀌면(롤오버) 이전 항목은 폐기.
+REPORT_CACHE_SIZE = 4096
+# Report 필드/내용 형식이 바뀌면 올린다 -> 예전 L2 행은 키가 달라 조회되지 않고 롤오버 때 지워짐
+REPORT_SCHEMA_VERSION = 2
+REPORT_CACHE_DB = os.environ.get("SAJU_CACHE_DB", os.path.join(tempfile.gettempdir(), "saju_report_cache.sqlite3"))
+
+
+class ReportCache:
+    """build_report 결과를 L1(OrderedDict LRU) -> L2(SQLite) 순으로 조회하는 캐시.
+
+    db_path=None이면 L2 없이 프로세스 내 LRU만 사용한다. 여러 Streamlit/워커 프로세스가
+    같은 db_path를 쓰면 서로의 계산 결과를 재사용한다. 차트는 저장하지 않고 조회 시
+    render_chart 캐시에서 채운다 (with_chart=False면 생략 -> 점진 렌더링용).
+    """
+
+    def __init__(self, maxsize=REPORT_CACHE_SIZE, db_path=REPORT_CACHE_DB):
+        self.maxsize = maxsize
+        self.db_path = db_path
+        self._lru = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._day = None
+        self.metrics = collections.Counter()
+        if db_path:
+            with self._db() as db:
+                db.execute("CREATE TABLE IF NOT EXISTS report (key TEXT PRIMARY KEY, day TEXT NOT NULL, value TEXT NOT NULL)")
+                db.execute("CREATE INDEX IF NOT EXISTS report_day ON report (day)")
+
+    def _db(self):
+        # sqlite3 연결은 스레드 간 공유 불가 -> 스레드별 연결
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.db_path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    @staticmethod
+    def make_key(gender, y, m, d, h, solar_date_str, lang_code, day, mi=0):
+        is_man = gender in ('남자', 'Male')
+        # 시각은 시지와 (연주, 월주)로만 구분 -> 절입일이 아니면 같은 시진의 분 단위 차이는 같은 키
+        y_gz, m_gz = year_month_pillars(y, m, d, h, mi)
+        return (f"v{REPORT_SCHEMA_VERSION}|{y:04d}{m:02d}{d:02d}|{(h + 1) // 2 % 12}|{y_gz}.{m_gz}|{int(is_man)}|{lang_code}|{day.isoformat()}"
+                f"|{solar_date_str}")
+
+    def _rollover(self, day):
+        # 호출 측에서 self._lock 보유. 기준일이 앞으로 넘어갈 때만 폐기
+        if self._day is not None and day <= self._day:
+            return
+        self._day = day
+        self.metrics["invalidations"] += len(self._lru)
+        self._lru.clear()
+        if self.db_path:
+            with self._db() as db:
+                db.execute("DELETE FROM report WHERE day < ?", (day.isoformat(),))
+
+    def get_report(self, engine, name, gender, y, m, d, h, is_lunar, solar_date_str, lang_code, day=None,
+                   with_chart=True, chart_format="png", mi=0):
+        """engine.build_report와 같은 인자를 받아 캐시된 Report를 반환 (없으면 계산 후 저장)."""
+        with METRICS.stage("cache_get_report"):
+            report = self._get_report(engine, gender, y, m, d, h, is_lunar, solar_date_str, lang_code, day, mi)
+            chart_img = render_chart(report.z_eng, m, d, chart_format) if with_chart else ""
+            return dataclasses.replace(report, name=name, ai_reading=ai_reading_text(name, report.me_oh, lang_code),
+                                       chart_img=chart_img, chart_format=chart_format)
+
+    def _get_report(self, engine, gender, y, m, d, h, is_lunar, solar_date_str, lang_code, day, mi=0):
+        day = day or datetime.date.today()
+        key = self.make_key(gender, y, m, d, h, solar_date_str, lang_code, day, mi)
+        with self._lock:
+            self._rollover(day)
+            report = self._lru.get(key)
+            if report is not None:
+                self._lru.move_to_end(key)
+                self.metrics["l1_hits"] += 1
+        if report is None:
+            report = self._load(key)
+            with self._lock:
+                self.metrics["l2_hits" if report is not None else "misses"] += 1
+            if report is None:
+                report = engine.build_report("", gender, y, m, d, h, is_lunar, solar_date_str, lang_code, day,
+                                             with_chart=False, mi=mi)
+                self._store(key, day, report)
+            self._put(key, report)
+        return report
+
+    def _put(self, key, report):
+        with self._lock:
+            self._lru[key] = report
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.maxsize:
+                self._lru.popitem(last=False)
+                self.metrics["evictions"] += 1
+
+    def _load(self, key):
+        if not self.db_path:
+            return None
+        row = self._db().execute("SELECT value FROM report WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        try:
+            return Report(**json.loads(row[0]))
+        except (TypeError, ValueError):
+            # 형식이 맞지 않는 행 (버전을 올리지 않은 스키마 변경 등)은 미스로 보고 다시 계산
+            return None
+
+    def _store(self, key, day, report):
+        if not self.db_path:
+            return
+        value = json.dumps(report.to_dict(), ensure_ascii=False)
+        with self._db() as db:
+            db.execute("INSERT OR REPLACE INTO report (key, day, value) VALUES (?, ?, ?)", (key, day.isoformat(), value))
+
+    def stats(self):
+        """hit/miss/eviction 카운터와 현재 크기 스냅샷."""
+        with self._lock:
+            snap = dict(self.metrics, l1_size=len(self._lru))
+        lookups = snap.get("l1_hits", 0) + snap.get("l2_hits", 0) + snap.get("misses", 0)
+        snap["hit_ratio"] = (lookups - snap.get("misses", 0)) / lookups if lookups else 0.0
+        return snap
+
+    @staticmethod
+    def prometheus(stats, prefix="saju"):
+        """stats() 결과 (여러 프로세스를 합친 것도 가능)를 Prometheus 텍스트로."""
+        events = sorted(k for k in stats if k not in ("l1_size", "hit_ratio"))
+        lines = [f"# TYPE {prefix}_report_cache_events_total counter"]
+        lines += [f'{prefix}_report_cache_events_total{{event="{k}"}} {stats[k]}' for k in events]
+        lines += [f"# TYPE {prefix}_report_cache_l1_size gauge", f"{prefix}_report_cache_l1_size {stats.get('l1_size', 0)}",
+                  f"# TYPE {prefix}_report_cache_hit_ratio gauge",
+                  f"{prefix}_report_cache_hit_ratio {stats.get('hit_ratio', 0.0):.6f}"]
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        with self._lock:
+            self._lru.clear()
+            self._day = None
+        if self.db_path:
+            with self._db() as db:
+                db.execute("DELETE FROM report")
+
+
+@process_singleton
+def get_report_cache():
+    """프로세스 공용 ReportCache (최초 호출 시 생성)."""
+    return ReportCache()
+
+
+# ==========================================
+# 2-3. 궁합 매칭 (Compatibility)
+# ==========================================
+# 점수 = 일간 관계 + 일지 관계 + 띠(연지) 관계 + 오행 보완. 모두 작은 범주값의 조회표 합이라
+# 회원을 (일주 60, 연지 12, 오행 보유 마스크 32, 성별 2) = 46,080개 "유형"으로 묶어두면
+# 질의 1건은 유형 점수만 계산하면 되고 회원 수와 무관하게 top-k를 뽑을 수 있다.
+COMPAT_N_TYPES = 60 * 12 * 32 * 2
+
+
+def _compat_tables():
+    stem = np.zeros((10, 10), dtype=np.int16)
+    for a in range(10):
+        for b in range(10):
+            rel = (GAN_OH_IDX[b] - GAN_OH_IDX[a]) % 5  # SHIPSIN_NAMES 인덱스
+            stem[a, b] = (5, 10, 0, 0, 15)[rel] + (30 if (a - b) % 10 == 5 else 0)  # 천간합
+    branch = np.zeros((12, 12), dtype=np.int16)
+    for a in range(12):
+        for b in range(12):
+            if (a + b) % 12 == 1:
+                branch[a, b] = 25      # 육합
+            elif a != b and a % 4 == b % 4:
+                branch[a, b] = 15      # 삼합
+            elif (a - b) % 12 == 6:
+                branch[a, b] = -20     # 충
+    popcount = np.array([i.bit_count() for i in range(32)], dtype=np.int16)
+    return stem, branch, branch * 2 // 5, popcount
+
+
+COMPAT_STEM, COMPAT_DAY_BRANCH, COMPAT_YEAR_BRANCH, _POPCOUNT5 = _compat_tables()
+
+
+def encode_compat_features(ganji, is_male):
+    """BatchEngine.get_ganji 결과 -> 궁합 특징 (day_stem, day_branch, year_branch, oh_mask, male, type) 배열."""
+    mask = np.zeros(np.shape(ganji["day"][0]), dtype=np.uint8)
+    for s, b in ganji.values():
+        mask |= (1 << GAN_OH_IDX[s]).astype(np.uint8) | (1 << JI_OH_IDX[b]).astype(np.uint8)
+    ds, db = np.asarray(ganji["day"][0], dtype=np.int64), np.asarray(ganji["day"][1], dtype=np.int64)
+    yb = np.asarray(ganji["year"][1], dtype=np.int64)
+    male = np.asarray(is_male, dtype=np.int64)
+    pillar60 = (6 * ds - 5 * db) % 60
+    ctype = ((pillar60 * 12 + yb) * 32 + mask) * 2 + male
+    return {"day_stem": ds.astype(np.uint8), "day_branch": db.astype(np.uint8), "year_branch": yb.astype(np.uint8),
+            "oh_mask": mask, "male": male.astype(bool), "type": ctype.astype(np.int32)}
+
+
+def compat_score(q, c):
+    """질의 특징 q(스칼라 dict)와 후보 특징 c(배열 dict)의 궁합 점수 배열."""
+    missing = ~int(q["oh_mask"]) & 31
+    return (COMPAT_STEM[q["day_stem"], c["day_stem"]] + COMPAT_DAY_BRANCH[q["day_branch"], c["day_branch"]]
+            + COMPAT_YEAR_BRANCH[q["year_branch"], c["year_branch"]] + 4 * _POPCOUNT5[c["oh_mask"] & missing])
+
+
+def _decode_types(types):
+    male = types % 2
+    rest = types // 2
+    mask, rest = rest % 32, rest // 32
+    yb, pillar60 = rest % 12, rest // 12
+    return {"day_stem": pillar60 % 10, "day_branch": pillar60 % 12, "year_branch": yb, "oh_mask": mask, "male": male}
+
+
+class CompatibilityIndex:
+    """회원 궁합 top-k 인덱스.
+
+    회원을 궁합 유형별 버킷으로 정렬해 두고(order/offsets), 질의 시 존재하는 유형들의 점수를
+    한 번에 계산해 점수 순으로 버킷을 이어 붙인다. 같은 점수 안에서는 유형 코드, 회원 순서 순.
+    """
+
+    def __init__(self, ids, features):
+        self.ids = np.asarray(ids)
+        self.features = features
+        self.order = np.argsort(features["type"], kind="stable")
+        counts = np.bincount(features["type"], minlength=COMPAT_N_TYPES)
+        self.offsets = np.concatenate(([0], np.cumsum(counts)))
+        self.types = np.flatnonzero(counts)
+        self.type_counts = counts[self.types]
+        self.type_features = _decode_types(self.types)
+
+    @classmethod
+    def build(cls, ids, y, m, d, h, is_male):
+        ganji = BatchEngine().get_ganji(y, m, d, h)
+        return cls(ids, encode_compat_features(ganji, is_male))
+
+    @staticmethod
+    def query_features(y, m, d, h, is_male):
+        ganji = BatchEngine().get_ganji([y], [m], [d], [h])
+        return {k: v[0] for k, v in encode_compat_features(ganji, [is_male]).items()}
+
+    def top_k(self, q, k=10, opposite_gender=True, exclude=None):
+        """질의 특징 q의 상위 k명. 반환: (회원 id 배열, 점수 배열)"""
+        scores = compat_score(q, self.type_features)
+        valid = self.type_features["male"] != int(q["male"]) if opposite_gender else np.ones(len(self.types), bool)
+        sel = np.flatnonzero(valid)
+        ranked = sel[np.argsort(-scores[sel], kind="stable")]
+        need = k + (1 if exclude is not None else 0)
+        upto = np.searchsorted(np.cumsum(self.type_counts[ranked]), need) + 1
+        picked = [self.order[self.offsets[t]:self.offsets[t + 1]] for t in self.types[ranked[:upto]]]
+        type_scores = [np.full(len(p), s) for p, s in zip(picked, scores[ranked[:upto]])]
+        members = np.concatenate(picked) if picked else np.zeros(0, dtype=np.int64)
+        member_scores = np.concatenate(type_scores) if type_scores else np.zeros(0, dtype=np.int16)
+        if exclude is not None:
+            keep = self.ids[members] != exclude
+            members, member_scores = members[keep], member_scores[keep]
+        return self.ids[members[:k]], member_scores[:k]
+
+    def score_block(self, q, start, stop):
+        """회원 [start, stop) 구간의 점수를 벡터 연산으로 계산."""
+        return compat_score(q, {key: v[start:stop] for key, v in self.features.items()})
+
+    def top_k_scan(self, q, k=10, opposite_gender=True, block=1 << 20):
+        """버킷 없이 전 회원을 블록 단위로 채점하는 기준 구현 (검증/비교용)."""
+        best_idx, best_score = np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int32)
+        for start in range(0, len(self.ids), block):
+            stop = min(start + block, len(self.ids))
+            s = self.score_block(q, start, stop).astype(np.int32)
+            idx = np.arange(start, stop)
+            if opposite_gender:
+                keep = self.features["male"][start:stop] != bool(q["male"])
+                idx, s = idx[keep], s[keep]
+            cand = np.concatenate((best_idx, idx))
+            cs = np.concatenate((best_score, s))
+            if len(cs) > k:
+                top = np.argpartition(-cs, k)[:k]
+                cand, cs = cand[top], cs[top]
+            best_idx, best_score = cand, cs
+        order = np.argsort(-best_score, kind="stable")
+        return self.ids[best_idx[order]], best_score[order]
+
+
+# ==========================================
+# 2-4. 운세 타임라인 (일진·월운·세운)
+# ==========================================
+# 시작점의 간지만 get_ganji와 같은 규칙으로 한 번 구하고, 이후는 60갑자를 1칸씩 전진.
+# (일주는 하루, 월주는 한 달, 연주는 한 해마다 천간/지지가 각각 +1)
+class LuckEntry(typing.NamedTuple):
+    period: object       # datetime.date (일) / (연, 월) / 연
+    stem: int
+    branch: int
+    stem_ship: str       # 일간 기준 십신
+    branch_ship: str
+
+
+class Timeline:
+    """일간(day stem) 기준 일진/월운/세운 생성기."""
+
+    def __init__(self, day_stem):
+        self.me_oh = GAN_OH[day_stem]
+        # 천간/지지 인덱스 -> 십신 (일간 고정이므로 미리 계산)
+        self._stem_ship = tuple(SHIPSIN_BY_OH[(self.me_oh, oh)] for oh in GAN_OH)
+        self._branch_ship = tuple(SHIPSIN_BY_OH[(self.me_oh, oh)] for oh in JI_OH)
+
+    @classmethod
+    def for_birth(cls, y, m, d, h):
+        return cls(get_engine().get_ganji(y, m, d, h)["day"][0])
+
+    def _walk(self, periods, stem, branch):
+        ss, bs = self._stem_ship, self._branch_ship
+        for p in periods:
+            yield LuckEntry(p, stem, branch, ss[stem], bs[branch])
+            stem = stem + 1 if stem < 9 else 0
+            branch = branch + 1 if branch < 11 else 0
+
+    def days(self, start, end):
+        """start 이상 end 미만의 일진 (datetime.date)."""
+        diff = start.toordinal() - BASE_ORDINAL
+        periods = map(datetime.date.fromordinal, range(start.toordinal(), end.toordinal()))
+        return self._walk(periods, diff % 10, (10 + diff) % 12)
+
+    def months(self, start, end):
+        """(연, 월) start 이상 end 미만의 월운."""
+        (y, m), (ey, em) = start, end
+        periods = (divmod(k, 12) for k in range(y * 12 + m - 1, ey * 12 + em - 1))
+        # (연, 월)의 월운 = 그 달 절입 이후의 월주 (양력 2월 -> 寅월)
+        y_stem = (6 + (y - 1900)) % 10
+        return self._walk(((py, pm + 1) for py, pm in periods), (M_START[y_stem] + (m - 2)) % 10, m % 12)
+
+    def years(self, start, end):
+        """start 이상 end 미만 연도의 세운."""
+        return self._walk(range(start, end), (6 + (start - 1900)) % 10, (start - 1900) % 12)
+
+    def days_array(self, start, end):
+        """days()의 벡터 버전. 반환: dates(datetime64[D]), stem, branch, stem_ship, branch_ship(코드) 배열."""
+        diff = np.arange(start.toordinal(), end.toordinal()) - BASE_ORDINAL
+        stem, branch = diff % 10, (10 + diff) % 12
+        me = OH_NAMES.index(self.me_oh)
+        return {"dates": np.datetime64(start, "D") + np.arange(len(diff)).astype("timedelta64[D]"),
+                "stem": stem, "branch": branch,
+                "stem_ship": (GAN_OH_IDX[stem] - me) % 5, "branch_ship": (JI_OH_IDX[branch] - me) % 5}
+
+
+# ==========================================
+# 2-5. 역방향 사주 검색 (Pillar Index)
+# ==========================================
+# 기간 전체를 "네 기둥이 변하지 않는 구간"으로 나눠 BatchEngine으로 한 번 계산하고,
+# 기둥별로 60갑자 -> 구간 목록(시작 시각 순)의 역색인을 만든다. 구간 경계는 시지가 바뀌는
+# 시각(0, 1, 3, ..., 21, 23시)과 만세력 테이블의 절입 시각.
+PILLAR_INDEX_START = datetime.date(1900, 1, 1)
+PILLAR_INDEX_END = datetime.date(2050, 12, 31)
+PILLAR_NAMES = ("year", "month", "day", "time")
+_HOUR_SEGMENT_STARTS = np.array([0] + list(range(60, 24 * 60, 120)))
+_PILLAR_WILDCARDS = ("?", "*", "")
+
+
+def parse_pillar_pattern(pattern):
+    """기둥 패턴 -> (천간, 지지) 인덱스 (와일드카드는 None).
+
+    None | "甲子" | "甲?" | "?子" | (천간 인덱스, 지지 인덱스) 형식. 잘못된 패턴은 ValueError.
+    """
+    if pattern is None:
+        return None, None
+    if isinstance(pattern, str):
+        if len(pattern) != 2:
+            raise ValueError(f"invalid pillar pattern: {pattern!r}")
+        s, b = pattern[0], pattern[1]
+        try:
+            stem = None if s in _PILLAR_WILDCARDS else GAN_HANJA.index(s)
+            branch = None if b in _PILLAR_WILDCARDS else JI_HANJA.index(b)
+        except ValueError:
+            raise ValueError(f"invalid pillar pattern: {pattern!r}") from None
+        return stem, branch
+    stem, branch = pattern
+    if (stem is not None and not 0 <= stem < 10) or (branch is not None and not 0 <= branch < 12):
+        raise ValueError(f"invalid pillar pattern: {pattern!r}")
+    return stem, branch
+
+
+def _matching_ganji(stem, branch):
+    """(천간, 지지) 패턴에 맞는 60갑자 인덱스 배열 (천간/지지 짝이 맞지 않으면 빈 배열)."""
+    gz = np.arange(60)
+    mask = np.ones(60, dtype=bool)
+    if stem is not None:
+        mask &= gz % 10 == stem
+    if branch is not None:
+        mask &= gz % 12 == branch
+    return gz[mask]
+
+
+class PillarIndex:
+    """네 기둥 (부분) 패턴 -> 출생 시각 구간 역색인.
+
+    starts[i]   : i번째 구간의 시작, start_ordinal 0시부터의 분 (uint32, 오름차순)
+    ganji[p][i] : i번째 구간의 기둥 p(PILLAR_NAMES) 60갑자 인덱스 (uint8)
+    order[p], offsets[p] : 기둥 p의 60갑자 g에 해당하는 구간 번호 = order[p][offsets[p][g]:offsets[p][g + 1]]
+                           (각 목록은 시간순)
+    """
+
+    def __init__(self, start_ordinal, n_days, starts, ganji):
+        self.start_ordinal = start_ordinal
+        self.n_days = n_days
+        self.starts = starts
+        self.ganji = ganji
+        self.order, self.offsets = {}, {}
+        for p, gz in ganji.items():
+            self.order[p] = np.argsort(gz, kind="stable").astype(np.uint32)
+            self.offsets[p] = np.concatenate(([0], np.cumsum(np.bincount(gz, minlength=60))))
+
+    @classmethod
+    def build(cls, start=PILLAR_INDEX_START, end=PILLAR_INDEX_END):
+        n_days = (end - start).days + 1
+        starts = (np.arange(n_days, dtype=np.int64)[:, None] * 1440 + _HOUR_SEGMENT_STARTS).ravel()
+        table = get_manse_table()
+        if table is not None:
+            # 절입 시각에서 월주(입춘이면 연주도)가 바뀌므로 그 시각도 구간 경계
+            i0 = start.toordinal() - table.start_ordinal
+            lo, hi = max(i0, 0), min(i0 + n_days, len(table.switch_min))
+            switch = np.asarray(table.switch_min[lo:hi], dtype=np.int64)
+            days = np.flatnonzero(switch < MANSE_NO_SWITCH)
+            starts = np.union1d(starts, (days + lo - i0) * 1440 + switch[days])
+        dates = np.datetime64(start, "D") + (starts // 1440).astype("timedelta64[D]")
+        y, m, d = _split_datetime64(dates)
+        ganji = BatchEngine().get_ganji(y, m, d, starts % 1440 // 60, starts % 60)
+        return cls(start.toordinal(), n_days, starts.astype(np.uint32),
+                   {p: ganji_index(*ganji[p]).astype(np.uint8) for p in PILLAR_NAMES})
+
+    @property
+    def nbytes(self):
+        return self.starts.nbytes + sum(a.nbytes for p in PILLAR_NAMES
+                                        for a in (self.ganji[p], self.order[p], self.offsets[p]))
+
+    def _constraints(self, patterns):
+        out = []
+        for p, pattern in zip(PILLAR_NAMES, patterns):
+            stem, branch = parse_pillar_pattern(pattern)
+            if stem is not None or branch is not None:
+                gz = _matching_ganji(stem, branch)
+                size = int((self.offsets[p][gz + 1] - self.offsets[p][gz]).sum())
+                out.append((size, p, stem, branch, gz))
+        return sorted(out, key=lambda c: c[0])
+
+    def query_ids(self, year=None, month=None, day=None, time=None):
+        """패턴에 맞는 구간 번호 (오름차순). 가장 좁은 기둥의 색인 목록을 나머지 기둥으로 걸러낸다."""
+        cons = self._constraints((year, month, day, time))
+        if not cons:
+            return np.arange(len(self.starts))
+        _, p, _, _, gz = cons[0]
+        order, offsets = self.order[p], self.offsets[p]
+        ids = np.concatenate([order[offsets[g]:offsets[g + 1]] for g in gz]) if len(gz) else np.zeros(0, np.uint32)
+        if len(gz) > 1:
+            ids.sort()
+        for _, p, stem, branch, _ in cons[1:]:
+            if not len(ids):
+                break
+            g = self.ganji[p][ids]
+            keep = np.ones(len(ids), dtype=bool)
+            if stem is not None:
+                keep &= g % 10 == stem
+            if branch is not None:
+                keep &= g % 12 == branch
+            ids = ids[keep]
+        return ids
+
+    def query_scan(self, year=None, month=None, day=None, time=None):
+        """색인 없이 전 구간을 훑는 기준 구현 (검증/비교용)."""
+        keep = np.ones(len(self.starts), dtype=bool)
+        for p, pattern in zip(PILLAR_NAMES, (year, month, day, time)):
+            stem, branch = parse_pillar_pattern(pattern)
+            if stem is not None:
+                keep &= self.ganji[p] % 10 == stem
+            if branch is not None:
+                keep &= self.ganji[p] % 12 == branch
+        return np.flatnonzero(keep)
+
+    def intervals(self, ids):
+        """구간 번호 -> [(시작 datetime, 끝 datetime), ...] (끝은 다음 구간 시작, 미포함)."""
+        base = datetime.datetime.combine(datetime.date.fromordinal(self.start_ordinal), datetime.time())
+        ids = np.asarray(ids, dtype=np.int64)
+        ends = np.append(self.starts, self.n_days * 1440)[ids + 1]
+        return [(base + datetime.timedelta(minutes=int(s)), base + datetime.timedelta(minutes=int(e)))
+                for s, e in zip(self.starts[ids], ends)]
+
+    def search(self, year=None, month=None, day=None, time=None, limit=None):
+        """패턴에 맞는 출생 시각 구간 목록 (시간순, limit개까지)."""
+        return self.intervals(self.query_ids(year, month, day, time)[:limit])
+
+
+@process_singleton
+def get_pillar_index():
+    """PILLAR_INDEX_START ~ PILLAR_INDEX_END 역색인 (프로세스당 1회 생성)."""
+    return PillarIndex.build()
+
+
+def to_solar(y, m, d, is_lunar, is_leap=False):
+    """입력 날짜를 양력으로 변환. 반환: (y, m, d, 표시용 문자열)"""
+    if not is_lunar:
+        return y, m, d, f"{y}-{m}-{d}"
+    table = get_lunar_table()
+    if table is not None and LUNAR_SOLAR_START.year <= y <= LUNAR_SOLAR_END.year:
+        solar = table.lunar_to_solar(y, m, d, is_leap)
+        y, m, d = solar.year, solar.month, solar.day
+    else:
+        cal = KoreanLunarCalendar()
+        if not cal.setLunarDate(y, m, d, is_leap):
+            raise ValueError(f"invalid lunar date: {y}-{m}-{d} (leap={is_leap})")
+        y, m, d = cal.solarYear, cal.solarMonth, cal.solarDay
+    return y, m, d, f"{y}-{m}-{d} (Lunar Conv.)"
 
 # ==========================================
 # 3. Streamlit 앱 실행부
 # ==========================================
 def main():
     st.set_page_config(page_title="AI 운세/Destiny", page_icon="🔮", layout="centered", initial_sidebar_state="collapsed")
-    
+    start_fortune_rollover()  # 프로세스당 1회 (이후 rerun에서는 기존 스레드 반환)
+
+    # ?debug=1: 이 실행 동안만 단계별 계측을 켜고(METRICS.scope) 리포트 아래에 디버그 패널 표시
+    debug = st.query_params.get("debug") == "1"
+    # ?chart=svg: PNG 대신 경량 SVG 차트
+    chart_format = "svg" if st.query_params.get("chart") == "svg" else "png"
+
     # 세션 스테이트 초기화 (언어 설정)
     if 'lang' not in st.session_state:
         st.session_state.lang = "KO" # 기본값 한국어
@@ -407,32 +1800,54 @@ def main():
         btn_run = st.button(L['btn_run'], type="primary")
 
     if btn_run:
-        if not name or len(birth_txt) != 8:
-            st.error(L['err_msg'])
-            return
-        engine = UniversalEngine()
-        y, m, d = int(birth_txt[:4]), int(birth_txt[4:6]), int(birth_txt[6:8])
-        h = b_time.hour
-        solar_str = f"{y}-{m}-{d}"
-        if cal_type == L['cal_lunar']:
-            cal = KoreanLunarCalendar()
-            cal.setLunarDate(y, m, d, is_leap)
-            y, m, d = cal.solarYear, cal.solarMonth, cal.solarDay
-            solar_str = f"{y}-{m}-{d} (Lunar Conv.)"
+        with METRICS.scope(debug):
+            if not name or len(birth_txt) != 8:
+                st.error(L['err_msg'])
+                return
+            engine = get_engine()
+            y, m, d = int(birth_txt[:4]), int(birth_txt[4:6]), int(birth_txt[6:8])
+            h = b_time.hour
+            try:
+                with METRICS.stage("main_lunar"):
+                    y, m, d, solar_str = to_solar(y, m, d, cal_type == L['cal_lunar'], is_leap)
+            except ValueError:
+                st.error(L['err_msg'])
+                return
             
-        with st.spinner(L['loading']):
-            html_report = engine.generate_full_report(name, gender_sel, y, m, d, h, (cal_type==L['cal_lunar']), solar_str, st.session_state.lang)
-            st.markdown(html_report, unsafe_allow_html=True)
-            st.markdown("---")
-            ad_content = f"""
-            <div style="background-color: rgba(128, 128, 128, 0.1); border-radius: 10px; padding: 20px; text-align: center; border: 1px dashed rgba(128, 128, 128, 0.3); color: inherit;">
-                <p style="opacity: 0.7; font-size: 12px; margin: 0;">ADVERTISEMENT</p>
-                <div style="margin: 10px 0; font-weight: bold; color: #1a73e8;">{L['ad_title']}</div>
-                <p style="opacity: 0.8; font-size: 14px;">{L['ad_desc']}</p>
-            </div>
-            """
-            components.html(ad_content, height=150)
-            st.caption(L['footer'])
+            # 점진 렌더링: 싼 섹션은 바로 출력하고, 차트만 백그라운드 스레드에서 그려 자리를 채운다
+            with METRICS.stage("main_full_report"):
+                with METRICS.stage("main_first_section"):
+                    report = get_report_cache().get_report(engine, name, gender_sel, y, m, d, h, (cal_type==L['cal_lunar']), solar_str, st.session_state.lang,
+                                                           with_chart=False, chart_format=chart_format, mi=b_time.minute)
+                    chart_future = get_section_executor().submit(METRICS.bind(render_chart), report.z_eng, m, d, chart_format)
+                    st.markdown(REPORT_CSS, unsafe_allow_html=True)
+                    panels = [st.container(border=True), st.container(border=True)]
+                    slots = {section: panels[panel].empty() for panel, section, _ in REPORT_SECTIONS}
+                    slots["pillars"].markdown(render_section(report, "pillars"), unsafe_allow_html=True)
+                for _, section, _ in REPORT_SECTIONS[1:]:
+                    if section == "chart":
+                        slots[section].caption(L['loading'])
+                    else:
+                        slots[section].markdown(render_section(report, section), unsafe_allow_html=True)
+                report = dataclasses.replace(report, chart_img=chart_future.result())
+                slots["chart"].markdown(render_section(report, "chart"), unsafe_allow_html=True)
+            with st.container():
+                st.markdown("---")
+                ad_content = f"""
+                <div style="background-color: rgba(128, 128, 128, 0.1); border-radius: 10px; padding: 20px; text-align: center; border: 1px dashed rgba(128, 128, 128, 0.3); color: inherit;">
+                    <p style="opacity: 0.7; font-size: 12px; margin: 0;">ADVERTISEMENT</p>
+                    <div style="margin: 10px 0; font-weight: bold; color: #1a73e8;">{L['ad_title']}</div>
+                    <p style="opacity: 0.8; font-size: 14px;">{L['ad_desc']}</p>
+                </div>
+                """
+                components.html(ad_content, height=150)
+                st.caption(L['footer'])
+
+        if debug:
+            with st.expander("⏱ Debug metrics", expanded=True):
+                st.dataframe(METRICS.snapshot())
+                st.json(get_report_cache().stats())
+                st.code(METRICS.prometheus(), language="text")
 
 if __name__ == "__main__":
     main()
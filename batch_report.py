@@ -0,0 +1,177 @@
+# 대량 리포트 배치 CLI: CSV/Parquet 입력을 청크 단위로 읽어 프로세스 풀에서 계산하고
+# JSON Lines 또는 CSV로 순서대로 이어 쓴다. 중단 후 같은 명령으로 다시 실행하면 이어서 처리.
+#
+#   python batch_report.py members.csv -o reports.jsonl
+#   python batch_report.py members.parquet -o reports.csv --workers 8 --chunk-size 5000
+#
+# 입력 컬럼: name, gender(M/F/남자/여자), calendar(solar/lunar/양력/음력), birth(YYYYMMDD),
+#            time(HH:MM, 생략 시 12:00), leap(0/1, 생략 가능)
+# Parquet 입력은 pyarrow가 설치되어 있어야 한다.
+
+import argparse
+import collections
+import concurrent.futures
+import csv
+import datetime
+import itertools
+import json
+import os
+import sys
+import time
+
+import app as saju
+
+CSV_FIELDS = ["row", "name", "solar_date", "year", "month", "day", "time", "daewoon",
+              "zodiac", "s_d_score", "z_d_score", "error"]
+
+
+def read_rows(path, batch_size=10_000):
+    """입력 파일을 dict 행 단위로 스트리밍 (전체를 메모리에 올리지 않음)."""
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+            yield from batch.to_pylist()
+    else:
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            yield from csv.DictReader(f)
+
+
+def chunked(rows, size, start=0):
+    """(시작 행 번호, 행 리스트) 청크 생성."""
+    it = iter(rows)
+    while True:
+        chunk = list(itertools.islice(it, size))
+        if not chunk:
+            return
+        yield start, chunk
+        start += len(chunk)
+
+
+def report_row(engine, row, lang_code, day):
+    name = str(row.get("name") or "").strip()
+    birth = str(row.get("birth") or "").strip().replace("-", "")
+    if not name or len(birth) != 8 or not birth.isdigit():
+        raise ValueError("name and 8-digit birth date are required")
+    L = saju.LANG_PACK[lang_code]
+    gender = L["gender_f"] if str(row.get("gender", "M")).strip().upper() in ("F", "FEMALE", "여자", "여") else L["gender_m"]
+    is_lunar = str(row.get("calendar", "solar")).strip().lower() in ("lunar", "음력")
+    is_leap = str(row.get("leap") or "0").strip().lower() in ("1", "true", "y", "yes")
+    h, _, mi = str(row.get("time") or "12:00").partition(":")
+    h, mi = int(h), int(mi or 0)
+    if not (0 <= h <= 23 and 0 <= mi <= 59):
+        raise ValueError(f"time out of range: {row.get('time')}")
+    y, m, d, solar_str = saju.to_solar(int(birth[:4]), int(birth[4:6]), int(birth[6:8]), is_lunar, is_leap)
+    return engine.build_report(name, gender, y, m, d, h, is_lunar, solar_str, lang_code, day, with_chart=False, mi=mi)
+
+
+def process_chunk(start, rows, lang_code, day):
+    """풀 워커에서 실행: 청크의 각 행을 출력 레코드(dict)로 변환. 잘못된 행은 error만 채움."""
+    engine = saju.get_engine()
+    out = []
+    for i, row in enumerate(rows, start):
+        try:
+            report = report_row(engine, row, lang_code, day).to_dict()
+            del report["chart_img"]
+            out.append({"row": i, **report, "error": None})
+        except (ValueError, TypeError, KeyError) as e:
+            out.append({"row": i, "name": row.get("name"), "error": str(e)})
+    return out
+
+
+def to_csv_record(rec):
+    if rec["error"]:
+        return {"row": rec["row"], "name": rec["name"], "error": rec["error"]}
+    pillars = {label.lower(): col["gan"] + col["ji"] for label, col in zip(saju._PILLAR_LABELS, rec["saju"])}
+    return {"row": rec["row"], "name": rec["name"], "solar_date": rec["solar_date_str"], **pillars,
+            "daewoon": " ".join(f"{dw['age']}:{dw['gan']}{dw['ji']}" for dw in rec["daewoon"]),
+            "zodiac": rec["z_eng"], "s_d_score": rec["s_d_score"], "z_d_score": rec["z_d_score"], "error": ""}
+
+
+class Checkpoint:
+    """출력 파일 옆 .ckpt에 처리 완료 행 수와 출력 바이트 위치를 기록.
+
+    출력을 flush/fsync한 뒤에만 갱신하고, 재개 시 기록된 위치 뒤의 (중간에 끊긴) 출력은 잘라낸다.
+    """
+
+    def __init__(self, output):
+        self.path = output + ".ckpt"
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return 0, 0
+        with open(self.path) as f:
+            state = json.load(f)
+        return state["rows_done"], state["offset"]
+
+    def save(self, rows_done, offset):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"rows_done": rows_done, "offset": offset}, f)
+        os.replace(tmp, self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def run(args):
+    ckpt = Checkpoint(args.output)
+    done, offset = ckpt.load() if not args.restart else (0, 0)
+    is_csv = args.output.endswith(".csv")
+    if done:
+        with open(args.output, "r+b") as f:
+            f.truncate(offset)
+    mode = "a" if done else "w"
+    day = args.day or datetime.date.today()
+    rows = itertools.islice(read_rows(args.input), done, None)
+
+    t0, processed, errors = time.perf_counter(), 0, 0
+    with open(args.output, mode, newline="", encoding="utf-8") as out, \
+            concurrent.futures.ProcessPoolExecutor(max_workers=args.workers) as pool:
+        writer = csv.DictWriter(out, fieldnames=CSV_FIELDS) if is_csv else None
+        if writer and not done:
+            writer.writeheader()
+        # 동시에 떠 있는 청크 수를 제한해 메모리를 일정하게 유지하고, 제출 순서대로 기록
+        pending = collections.deque()
+        chunks = chunked(rows, args.chunk_size, start=done)
+        while True:
+            while len(pending) < args.workers * 2:
+                nxt = next(chunks, None)
+                if nxt is None:
+                    break
+                pending.append(pool.submit(process_chunk, *nxt, args.lang, day))
+            if not pending:
+                break
+            records = pending.popleft().result()
+            for rec in records:
+                errors += rec["error"] is not None
+                if writer:
+                    writer.writerow(to_csv_record(rec))
+                else:
+                    out.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            out.flush()
+            os.fsync(out.fileno())
+            processed += len(records)
+            ckpt.save(done + processed, out.tell())
+            elapsed = time.perf_counter() - t0
+            print(f"\r{done + processed:,} rows  {processed / elapsed:,.0f} rows/s  errors={errors:,}",
+                  end="", file=sys.stderr, flush=True)
+    ckpt.clear()
+    print(file=sys.stderr)
+    return processed, errors
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="CSV/Parquet 대량 사주 리포트 생성")
+    p.add_argument("input", help="입력 CSV 또는 .parquet 파일")
+    p.add_argument("-o", "--output", required=True, help="출력 파일 (.jsonl 또는 .csv)")
+    p.add_argument("--lang", default="KO", choices=sorted(saju.LANG_PACK))
+    p.add_argument("--day", type=datetime.date.fromisoformat, help="운세 기준일 YYYY-MM-DD (기본 오늘)")
+    p.add_argument("--workers", type=int, default=os.cpu_count())
+    p.add_argument("--chunk-size", type=int, default=2000)
+    p.add_argument("--restart", action="store_true", help="체크포인트를 무시하고 처음부터")
+    run(p.parse_args(argv))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,513 @@
+# 성능 측정 스크립트: python bench.py [섹션 ...] [--save 결과.json] [--compare 기준.json]
+# 섹션을 지정하지 않으면 전체를 실행한다. --compare는 처리량이 기준 대비
+# REGRESSION_TOLERANCE 이상 떨어진 항목이 있으면 종료 코드 1로 끝난다 (배포 전 점검용).
+
+import asyncio
+import concurrent.futures
+import dataclasses
+import datetime
+import http.client
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.parse
+
+import numpy as np
+
+import app
+import check
+
+REGRESSION_TOLERANCE = 0.2
+BENCH_DAY = datetime.date(2026, 1, 1)  # 운세 기준일 고정 -> 재현 가능
+
+
+def _timeit(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _random_births(n, seed=0):
+    rng = np.random.default_rng(seed)
+    ords = rng.integers(app.days_since_1900(1900, 1, 1), app.days_since_1900(2050, 12, 31) + 1, n)
+    dates = np.datetime64("1900-01-01") + ords.astype("timedelta64[D]")
+    y = dates.astype("datetime64[Y]").astype(int) + 1970
+    m = dates.astype("datetime64[M]").astype(int) % 12 + 1
+    d = (dates - dates.astype("datetime64[M]")).astype(int) + 1
+    h = rng.integers(0, 24, n)
+    is_male = rng.integers(0, 2, n).astype(bool)
+    return y, m, d, h, is_male
+
+
+def bench_batch(n=200_000, loop_n=20_000):
+    """BatchEngine vs 레코드 단위 UniversalEngine 루프 처리량 비교."""
+    y, m, d, h, is_male = _random_births(n)
+    engine, batch = app.UniversalEngine(), app.BatchEngine()
+
+    def scalar_loop():
+        for i in range(loop_n):
+            g = engine.get_ganji(int(y[i]), int(m[i]), int(d[i]), int(h[i]))
+            me_oh = engine.gan_oh[g["day"][0]]
+            for s, b in g.values():
+                engine.get_shipsin(me_oh, engine.gan_oh[s])
+                engine.get_shipsin(me_oh, engine.ji_oh[b])
+            engine.get_daewoon(g["year"][0], g["month"][0], g["month"][1],
+                               "Male" if is_male[i] else "Female", "EN")
+
+    t_loop = _timeit(scalar_loop, repeat=1)
+    t_batch = _timeit(lambda: batch.run(y, m, d, h, is_male))
+    # 표본에서 UniversalEngine과 결과 대조 (간지, 십신, 대운)
+    ganji, shipsin, (dw_s, dw_b) = batch.run(y, m, d, h, is_male)
+    for i in np.random.default_rng(1).integers(0, n, 5_000):
+        g = engine.get_ganji(int(y[i]), int(m[i]), int(d[i]), int(h[i]))
+        me_oh = engine.gan_oh[g["day"][0]]
+        for p, (s, b) in g.items():
+            assert (ganji[p][0][i], ganji[p][1][i]) == (s, b), (i, p)
+            assert app.SHIPSIN_NAMES[shipsin[p][0][i]] == engine.get_shipsin(me_oh, engine.gan_oh[s]), (i, p)
+            assert app.SHIPSIN_NAMES[shipsin[p][1][i]] == engine.get_shipsin(me_oh, engine.ji_oh[b]), (i, p)
+        dw = engine.get_daewoon(g["year"][0], g["month"][0], g["month"][1], "Male" if is_male[i] else "Female", "EN")
+        assert [x["gan"] + x["ji"] for x in dw] == [app.GAN_HANJA[s] + app.JI_HANJA[b]
+                                                    for s, b in zip(dw_s[i], dw_b[i])], i
+    print(f"[batch] scalar loop : {loop_n / t_loop:>12,.0f} rec/s")
+    print(f"[batch] BatchEngine : {n / t_batch:>12,.0f} rec/s  (x{(n / t_batch) / (loop_n / t_loop):.0f})")
+
+
+def _latency_report(tag, lat, wall):
+    lat = np.sort(np.asarray(lat)) * 1000
+    print(f"[{tag}] n={len(lat)}  p50={np.percentile(lat, 50):.2f}ms  "
+          f"p99={np.percentile(lat, 99):.2f}ms  {len(lat) / wall:,.1f} req/s")
+
+
+API_PAYLOADS = [
+    {"name": "홍길동", "gender": "M", "birth": "19800101", "hour": 12, "lang": "KO"},
+    {"name": "Jane", "gender": "F", "birth": "19921124", "hour": 3, "lang": "EN"},
+    {"name": "김음력", "gender": "F", "birth": "19750815", "hour": 20, "calendar": "lunar", "lang": "KO"},
+]
+
+
+def bench_api(n=300, concurrency=16):
+    """리포트 API 부하 테스트. SAJU_API_URL이 있으면 HTTP로, 없으면 ASGI 앱을 프로세스 내에서 호출."""
+    url = os.environ.get("SAJU_API_URL")
+    bodies = [json.dumps(API_PAYLOADS[i % len(API_PAYLOADS)]).encode() for i in range(n)]
+    if url:
+        u = urllib.parse.urlsplit(url)
+
+        def one(body):
+            conn = http.client.HTTPConnection(u.hostname, u.port or 80, timeout=30)
+            t0 = time.perf_counter()
+            conn.request("POST", "/report", body, {"content-type": "application/json"})
+            resp = conn.getresponse()
+            resp.read()
+            conn.close()
+            assert resp.status == 200, resp.status
+            return time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        with concurrent.futures.ThreadPoolExecutor(concurrency) as ex:
+            lat = list(ex.map(one, bodies))
+        _latency_report("api http", lat, time.perf_counter() - t0)
+        return
+
+    import api
+
+    async def one(body, sem):
+        async with sem:
+            status = []
+
+            async def receive():
+                return {"type": "http.request", "body": body, "more_body": False}
+
+            async def send(msg):
+                if msg["type"] == "http.response.start":
+                    status.append(msg["status"])
+
+            t0 = time.perf_counter()
+            await api.app({"type": "http", "method": "POST", "path": "/report"}, receive, send)
+            assert status == [200], status
+            return time.perf_counter() - t0
+
+    async def run():
+        sem = asyncio.Semaphore(concurrency)
+        await one(bodies[0], sem)  # 풀 워커 기동 시간은 제외
+        t0 = time.perf_counter()
+        lat = await asyncio.gather(*(one(b, sem) for b in bodies))
+        _latency_report(f"api asgi/{api.POOL_KIND}", lat, time.perf_counter() - t0)
+
+    asyncio.run(run())
+
+
+def bench_lunar(n=20_000, bulk_n=1_000_000):
+    """음력->양력 변환: KoreanLunarCalendar vs LunarTable (스칼라/벌크)."""
+    from korean_lunar_calendar import KoreanLunarCalendar
+    table = app.get_lunar_table()
+    rng = np.random.default_rng(0)
+    idx = rng.integers(0, len(table.solar_to_lunar), bulk_n)
+    code = table.solar_to_lunar[idx]
+    ly, lm, ld, leap = code >> 10, (code >> 6) & 0xF, code & 0x1F, (code & 0x20).astype(bool)
+    rows = list(zip(ly[:n].tolist(), lm[:n].tolist(), ld[:n].tolist(), leap[:n].tolist()))
+
+    def klc():
+        for r in rows:
+            cal = KoreanLunarCalendar()
+            cal.setLunarDate(*r)
+
+    def tbl():
+        for r in rows:
+            table.lunar_to_solar(*r)
+
+    t_klc, t_tbl = _timeit(klc, repeat=1), _timeit(tbl)
+    t_bulk = _timeit(lambda: table.lunar_to_solar_bulk(ly, lm, ld, leap))
+    print(f"[lunar] KoreanLunarCalendar : {n / t_klc:>12,.0f} conv/s")
+    print(f"[lunar] LunarTable scalar   : {n / t_tbl:>12,.0f} conv/s")
+    print(f"[lunar] LunarTable bulk     : {bulk_n / t_bulk:>12,.0f} conv/s")
+
+
+def bench_manse(n=50_000, bulk_n=1_000_000, astro_n=200):
+    """연주/월주 조회: 요청마다 절기 천문 계산 vs ManseTable (스칼라/벌크) vs 절입일 근사."""
+    import build_manse_table
+    table = app.get_manse_table()
+    y, m, d, h, _ = _random_births(bulk_n)
+    mi = np.random.default_rng(1).integers(0, 60, bulk_n)
+    rows = list(zip(y[:n].tolist(), m[:n].tolist(), d[:n].tolist(), h[:n].tolist(), mi[:n].tolist()))
+
+    def astro():
+        # 테이블 없이 하려면 요청마다 그 해 절기를 풀어야 한다
+        for yy, *_ in rows[:astro_n]:
+            build_manse_table.solar_term_minutes([yy])
+
+    def tbl():
+        for r in rows:
+            table.pillars(*r)
+
+    t_astro, t_tbl = _timeit(astro, repeat=1), _timeit(tbl)
+    t_bulk = _timeit(lambda: table.pillars_bulk(y, m, d, h, mi))
+    t_approx = _timeit(lambda: app.approx_pillars(y, m, d))
+    print(f"[manse] astronomical/request : {astro_n / t_astro:>12,.0f} lookup/s")
+    print(f"[manse] ManseTable scalar    : {n / t_tbl:>12,.0f} lookup/s")
+    print(f"[manse] ManseTable bulk      : {bulk_n / t_bulk:>12,.0f} lookup/s")
+    print(f"[manse] approx rule bulk     : {bulk_n / t_approx:>12,.0f} lookup/s")
+    return {"manse_scalar_per_s": n / t_tbl, "manse_bulk_per_s": bulk_n / t_bulk}
+
+
+def bench_cache(n=5_000, distinct=500):
+    """인기 생일이 반복되는 트래픽에서 build_report vs ReportCache (L1/L2)."""
+    import tempfile
+    rng = np.random.default_rng(0)
+    y, m, d, h, is_male = (a[:distinct] for a in _random_births(distinct))
+    # Zipf 분포로 소수 생일에 요청 집중
+    picks = np.minimum(rng.zipf(1.3, n), distinct) - 1
+    engine = app.UniversalEngine()
+    rows = [(int(y[i]), int(m[i]), int(d[i]), int(h[i]), "남자" if is_male[i] else "여자") for i in picks]
+
+    def run(get):
+        for yy, mm, dd, hh, g in rows:
+            get(engine, "홍길동", g, yy, mm, dd, hh, False, f"{yy}-{mm}-{dd}", "KO")
+
+    t_raw = _timeit(lambda: run(lambda e, *a: e.build_report(*a)), repeat=1)
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = app.ReportCache(db_path=os.path.join(tmp, "cache.sqlite3"))
+        t_cold = _timeit(lambda: run(cache.get_report), repeat=1)
+        print(f"[cache] build_report      : {n / t_raw:>10,.0f} req/s")
+        print(f"[cache] cache (cold)      : {n / t_cold:>10,.0f} req/s  {cache.stats()}")
+        shared = app.ReportCache(db_path=cache.db_path)
+        t_l2 = _timeit(lambda: run(shared.get_report), repeat=1)
+        print(f"[cache] new process (L2)  : {n / t_l2:>10,.0f} req/s  {shared.stats()}")
+
+
+def bench_zodiac(n=1_000_000):
+    """get_zodiac_info: 선형 탐색 vs 366칸 테이블 (스칼라/벡터). 결과 대조는 check.py zodiac."""
+    engine = app.UniversalEngine()
+    dates = engine.db.zodiac_dates
+    _, mm, dd, _, _ = _random_births(n)
+    sample = check.ALL_DAYS * 50
+    t_scan = _timeit(lambda: [check.zodiac_scan(dates, m, d) for m, d in sample])
+    t_tbl = _timeit(lambda: [engine.get_zodiac_info(m, d) for m, d in sample])
+    t_bulk = _timeit(lambda: app.zodiac_index_bulk(mm, dd))
+    print(f"[zodiac] linear scan  : {len(sample) / t_scan:>12,.0f} lookups/s")
+    print(f"[zodiac] table scalar : {len(sample) / t_tbl:>12,.0f} lookups/s")
+    print(f"[zodiac] table bulk   : {n / t_bulk:>12,.0f} lookups/s")
+
+
+_STARTUP_PROBE = """
+import time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+app.get_engine().generate_full_report("홍길동", "남자", 1980, 1, 1, 12, False, "1980-1-1", "KO")
+t2 = time.perf_counter()
+app.get_engine().generate_full_report("홍길동", "남자", 1980, 1, 2, 12, False, "1980-1-2", "KO")
+t3 = time.perf_counter()
+print(t1 - t0, t2 - t1, t3 - t2)
+"""
+
+
+def bench_startup(runs=5):
+    """새 프로세스에서 import app 시간, 첫 리포트까지 시간, 두 번째 리포트 시간."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", _STARTUP_PROBE], cwd=here, check=True,
+                             capture_output=True, text=True).stdout
+        samples.append([float(x) for x in out.split()])
+    imp, first, second = np.median(np.array(samples), axis=0) * 1000
+    print(f"[startup] import app     : {imp:8.1f} ms")
+    print(f"[startup] first report   : {first:8.1f} ms  (lazy matplotlib import + chart render)")
+    print(f"[startup] second report  : {second:8.1f} ms")
+
+
+def bench_rerun(clicks=3):
+    """Streamlit rerun: 같은 생년월일로 여러 번 눌러도 차트는 한 번만 래스터화되는지 + 클릭별 시간."""
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_file(os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py"), default_timeout=60)
+    at.query_params["debug"] = "1"
+    at.run()
+    lat = []
+    for i in range(clicks):
+        at.text_input[0].input(f"홍길동{i}")
+        at.text_input[1].input("19900515")
+        at.button[0].click()
+        t0 = time.perf_counter()
+        at.run()
+        lat.append(time.perf_counter() - t0)
+        assert not at.exception, at.exception
+    rasterized = int(at.dataframe[0].value["chart_rasterize"]["count"])
+    assert rasterized == 1, f"chart rasterized {rasterized} times over {clicks} clicks"
+    print(f"[rerun] {clicks} clicks: " + "  ".join(f"{t * 1000:.0f} ms" for t in lat)
+          + f"  (chart rasterized {rasterized}x)")
+
+
+def bench_compat(n=2_000_000, queries=200, k=20):
+    """궁합 top-k: 유형 버킷 인덱스 vs 전 회원 블록 스캔. 상위 k 점수 일치 확인."""
+    y, m, d, h, is_male = _random_births(n)
+    t0 = time.perf_counter()
+    index = app.CompatibilityIndex.build(np.arange(n), y, m, d, h, is_male)
+    t_build = time.perf_counter() - t0
+    qy, qm, qd, qh, qmale = _random_births(queries, seed=7)
+    qs = [app.CompatibilityIndex.query_features(int(qy[i]), int(qm[i]), int(qd[i]), int(qh[i]), bool(qmale[i]))
+          for i in range(queries)]
+    lat = []
+    for q in qs:
+        t0 = time.perf_counter()
+        ids, scores = index.top_k(q, k)
+        lat.append(time.perf_counter() - t0)
+        assert (np.sort(scores) == np.sort(index.score_block(q, 0, n)[ids])).all()
+    for q in qs[:5]:
+        _, s_idx = index.top_k(q, k)
+        _, s_scan = index.top_k_scan(q, k)
+        assert (np.sort(s_idx) == np.sort(s_scan)).all()
+    t_scan = _timeit(lambda: index.top_k_scan(qs[0], k), repeat=1)
+    print(f"[compat] build {n:,} members : {t_build * 1000:.0f} ms  ({len(index.types):,} types)")
+    _latency_report("compat bucket top-k", lat, sum(lat))
+    print(f"[compat] block scan top-k   : {t_scan * 1000:.1f} ms/query")
+
+
+def bench_pillars(queries=200, loop_days=2_000):
+    """역방향 명식 검색: 역색인 vs 전 구간 스캔 vs get_ganji 전수 대입. 패턴 종류별 지연과 결과 일치 확인."""
+    t0 = time.perf_counter()
+    index = app.PillarIndex.build()
+    t_build = time.perf_counter() - t0
+    n = len(index.starts)
+    print(f"[pillars] build {index.n_days:,} days -> {n:,} segments : {t_build * 1000:.0f} ms  "
+          f"{index.nbytes / 2 ** 20:.1f} MiB")
+    rng = np.random.default_rng(0)
+
+    def pattern(i, p):
+        g = int(index.ganji[p][i])
+        return app.GAN_HANJA[g % 10] + app.JI_HANJA[g % 12]
+
+    kinds = {
+        "4 pillars": lambda i: {p: pattern(i, p) for p in app.PILLAR_NAMES},
+        "day+month branch": lambda i: {"day": pattern(i, "day"), "month": "?" + pattern(i, "month")[1]},
+        "year+day stem": lambda i: {"year": pattern(i, "year"), "day": pattern(i, "day")[0] + "?"},
+        "day only": lambda i: {"day": pattern(i, "day")},
+    }
+    result = {}
+    for kind, make in kinds.items():
+        qs = [make(i) for i in rng.integers(0, n, queries)]
+        lat, hits = [], 0
+        for q in qs:
+            t0 = time.perf_counter()
+            ids = index.query_ids(**q)
+            lat.append(time.perf_counter() - t0)
+            hits += len(ids)
+        for q in qs[:10]:
+            assert np.array_equal(index.query_ids(**q), index.query_scan(**q)), q
+        _latency_report(f"pillars {kind}, {hits / queries:,.0f} hits", lat, sum(lat))
+        result[f"pillars_{kind.replace(' ', '_').replace('+', '_')}_per_s"] = queries / sum(lat)
+    t_scan = _timeit(lambda: index.query_scan(**kinds["4 pillars"](0)))
+    print(f"[pillars] full segment scan     : {t_scan * 1000:.1f} ms/query")
+    # 색인 없이 get_ganji를 매 시진 대입 (일부 구간으로 측정해 전체로 환산)
+    engine = app.UniversalEngine()
+    start = app.PILLAR_INDEX_START.toordinal()
+
+    def brute():
+        for o in range(start, start + loop_days):
+            day = datetime.date.fromordinal(o)
+            for h in range(0, 24, 2):
+                engine.get_ganji(day.year, day.month, day.day, h)
+
+    t_brute = _timeit(brute, repeat=1) * index.n_days / loop_days
+    print(f"[pillars] get_ganji brute force : {t_brute * 1000:.0f} ms/query (estimated)")
+    return result
+
+
+def bench_timeline(years=10):
+    """10년 일진: get_ganji 반복 vs Timeline 생성기 vs 벡터 모드."""
+    engine = app.get_engine()
+    timeline = app.Timeline.for_birth(1980, 1, 1, 12)
+    start = datetime.date(2026, 1, 1)
+    end = datetime.date(start.year + years, 1, 1)
+    n = (end - start).days
+
+    def per_day():
+        me_oh = engine.gan_oh[engine.get_ganji(1980, 1, 1, 12)["day"][0]]
+        for i in range(n):
+            day = start + datetime.timedelta(days=i)
+            s, b = engine.get_ganji(day.year, day.month, day.day, 0)["day"]
+            engine.get_shipsin(me_oh, engine.gan_oh[s]), engine.get_shipsin(me_oh, engine.ji_oh[b])
+
+    t_loop = _timeit(per_day)
+    t_gen = _timeit(lambda: sum(1 for _ in timeline.days(start, end)))
+    t_arr = _timeit(lambda: timeline.days_array(start, end))
+    print(f"[timeline] {n:,} days  get_ganji loop {t_loop * 1000:.2f} ms  "
+          f"generator {t_gen * 1000:.2f} ms  array {t_arr * 1000:.2f} ms")
+    return {"timeline_days_per_s": n / t_gen, "timeline_array_days_per_s": n / t_arr}
+
+
+def bench_chart(samples=30):
+    """차트 렌더러 비교: PNG(matplotlib) vs SVG. 캐시 없이 렌더링 시간과 HTML 페이로드 크기. 검증은 check.py chart."""
+    engine = app.get_engine()
+    days = [(m, d) for m in range(1, 13) for d in (1, 15)][:samples]
+    result = {}
+    for fmt in app.CHART_RENDERERS:
+        renderer = app.CHART_RENDERERS[fmt].__wrapped__  # lru_cache 우회
+        lat, size = [], []
+        for m, d in days:
+            z_eng = engine.get_zodiac_info(m, d)[0]
+            t0 = time.perf_counter()
+            renderer(z_eng, m, d)
+            lat.append(time.perf_counter() - t0)
+            size.append(len(engine.generate_full_report("홍길동", "남자", 1990, m, d, 12, False, "x", "KO",
+                                                         day=BENCH_DAY, chart_format=fmt).encode()))
+        print(f"[chart] {fmt}: render p50 {np.median(lat) * 1000:8.2f} ms   report html {np.mean(size) / 1024:6.1f} KiB")
+        result[f"chart_{fmt}_renders_per_s"] = 1 / np.median(lat)
+    return result
+
+
+def bench_progressive(samples=24):
+    """점진 렌더링: 첫 섹션 표시까지 시간 vs 전체 리포트 시간 (차트 캐시 비운 상태, 리포트 캐시 미스)."""
+    engine = app.UniversalEngine()
+    executor = app.get_section_executor()
+    births = [(1990, m, d) for m in range(1, 13) for d in (3, 17)][:samples]
+    first, full, blocking = [], [], []
+    for y, m, d in births:
+        app.render_chart_png.cache_clear()
+        t0 = time.perf_counter()
+        app.render_html(engine.build_report("홍길동", "남자", y, m, d, 12, False, "x", "KO", day=BENCH_DAY))
+        blocking.append(time.perf_counter() - t0)
+
+        app.render_chart_png.cache_clear()
+        cache = app.ReportCache(db_path=None)
+        t0 = time.perf_counter()
+        report = cache.get_report(engine, "홍길동", "남자", y, m, d, 12, False, "x", "KO", day=BENCH_DAY, with_chart=False)
+        chart_future = executor.submit(app.render_chart, report.z_eng, m, d)
+        app.render_section(report, "pillars")
+        first.append(time.perf_counter() - t0)
+        for _, section, _ in app.REPORT_SECTIONS[1:]:
+            if section != "chart":
+                app.render_section(report, section)
+        report = dataclasses.replace(report, chart_img=chart_future.result())
+        app.render_section(report, "chart")
+        full.append(time.perf_counter() - t0)
+    print(f"[progressive] blocking report : p50 {np.median(blocking) * 1000:8.2f} ms")
+    print(f"[progressive] first section   : p50 {np.median(first) * 1000:8.2f} ms")
+    print(f"[progressive] full report     : p50 {np.median(full) * 1000:8.2f} ms")
+    return {"progressive_first_section_per_s": 1 / np.median(first)}
+
+
+def bench_report(n=2_000, batch_n=200_000):
+    """리포트 경로별 처리량 (scalar / cached / batch) + 단계별 계측 요약. 결과 dict 반환."""
+    y, m, d, h, is_male = _random_births(n)
+    rows = [(int(y[i]), int(m[i]), int(d[i]), int(h[i]), "남자" if is_male[i] else "여자") for i in range(n)]
+    engine = app.get_engine()
+    app.warm_chart_cache()
+    app.METRICS.enabled = True
+    app.METRICS.reset()
+
+    def scalar():
+        for yy, mm, dd, hh, g in rows:
+            engine.generate_full_report("홍길동", g, yy, mm, dd, hh, False, f"{yy}-{mm}-{dd}", "KO", day=BENCH_DAY)
+
+    cache = app.ReportCache(db_path=None)
+
+    def cached():
+        for yy, mm, dd, hh, g in rows:
+            app.render_report(cache.get_report(engine, "홍길동", g, yy, mm, dd, hh, False, f"{yy}-{mm}-{dd}", "KO", BENCH_DAY))
+
+    t_scalar = _timeit(scalar, repeat=1)
+    stages = app.METRICS.snapshot()
+    app.METRICS.enabled = False
+    cached()  # 캐시 채우기
+    t_cached = _timeit(cached)
+    by, bm, bd, bh, bmale = _random_births(batch_n)
+    t_batch = _timeit(lambda: app.BatchEngine().run(by, bm, bd, bh, bmale))
+    result = {"report_scalar_per_s": n / t_scalar, "report_cached_per_s": n / t_cached,
+              "report_batch_per_s": batch_n / t_batch}
+    for k, v in result.items():
+        print(f"[report] {k:<22}: {v:>12,.0f}")
+    for name, s in sorted(stages.items(), key=lambda kv: -kv[1]["total_ms"]):
+        print(f"[report]   stage {name:<16} avg {s['avg_ms']:8.4f} ms  alloc {s['alloc_blocks'] / s['count']:8.1f} blocks")
+    return result
+
+
+BENCHES = {
+    "batch": bench_batch,
+    "api": bench_api,
+    "lunar": bench_lunar,
+    "manse": bench_manse,
+    "cache": bench_cache,
+    "zodiac": bench_zodiac,
+    "startup": bench_startup,
+    "rerun": bench_rerun,
+    "compat": bench_compat,
+    "pillars": bench_pillars,
+    "report": bench_report,
+    "timeline": bench_timeline,
+    "chart": bench_chart,
+    "progressive": bench_progressive,
+}
+
+
+def main(argv):
+    names, save, compare = [], None, None
+    it = iter(argv)
+    for arg in it:
+        if arg == "--save":
+            save = next(it)
+        elif arg == "--compare":
+            compare = next(it)
+        else:
+            names.append(arg)
+    results = {}
+    for name in names or BENCHES:
+        results.update(BENCHES[name]() or {})
+    if save:
+        with open(save, "w") as f:
+            json.dump(results, f, indent=2)
+    if compare:
+        with open(compare) as f:
+            baseline = json.load(f)
+        failed = [k for k, v in results.items() if k in baseline and v < baseline[k] * (1 - REGRESSION_TOLERANCE)]
+        for k in failed:
+            print(f"REGRESSION {k}: {results[k]:,.0f} < baseline {baseline[k]:,.0f}")
+        return 1 if failed else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,50 @@
+# 음력/양력 변환 테이블 생성 + 전체 범위 검증
+#   python build_lunar_table.py            # lunar_table.bin 생성 후 검증
+#   python build_lunar_table.py --verify   # 기존 파일만 검증
+
+import datetime
+import sys
+import time
+
+import numpy as np
+from korean_lunar_calendar import KoreanLunarCalendar
+
+import app
+
+
+def verify(table):
+    """1900-01-31 ~ 2050-12-31 전 구간을 korean_lunar_calendar와 양방향 대조."""
+    cal = KoreanLunarCalendar()
+    n = len(table.solar_to_lunar)
+    sy, sm, sd, ly, lm, ld, leap = ([] for _ in range(7))
+    for i in range(n):
+        day = app.LUNAR_SOLAR_START + datetime.timedelta(days=i)
+        cal.setSolarDate(day.year, day.month, day.day)
+        expect = (cal.lunarYear, cal.lunarMonth, cal.lunarDay, bool(cal.isIntercalation))
+        got = table.solar_to_lunar_date(day.year, day.month, day.day)
+        assert got == expect, f"solar->lunar {day}: {got} != {expect}"
+        assert table.lunar_to_solar(*expect) == day, f"lunar->solar {expect}: != {day}"
+        cal.setLunarDate(*expect)
+        assert (cal.solarYear, cal.solarMonth, cal.solarDay) == (day.year, day.month, day.day)
+        for lst, v in zip((sy, sm, sd, ly, lm, ld, leap), (day.year, day.month, day.day) + expect):
+            lst.append(v)
+    by, bm, bd = table.lunar_to_solar_bulk(ly, lm, ld, leap)
+    assert (by == sy).all() and (bm == sm).all() and (bd == sd).all(), "bulk lunar->solar mismatch"
+    bly, blm, bld, bleap = table.solar_to_lunar_bulk(sy, sm, sd)
+    assert (bly == ly).all() and (blm == lm).all() and (bld == ld).all() and (bleap == np.array(leap)).all(), \
+        "bulk solar->lunar mismatch"
+    for bad in [(1980, 13, 1, False), (1980, 2, 31, False), (1980, 1, 1, True), (1899, 12, 1, False)]:
+        try:
+            table.lunar_to_solar(*bad)
+        except ValueError:
+            continue
+        raise AssertionError(f"accepted invalid lunar date {bad}")
+    print(f"verified {n:,} days OK")
+
+
+if __name__ == "__main__":
+    if "--verify" not in sys.argv:
+        t0 = time.perf_counter()
+        app.LunarTable.build().save()
+        print(f"built {app.LUNAR_TABLE_PATH} in {time.perf_counter() - t0:.1f}s")
+    verify(app.LunarTable.load())
@@ -0,0 +1,239 @@
+# 만세력(24절기) 테이블 생성 + 검증
+#   python build_manse_table.py            # manse_table.bin 생성 후 검증
+#   python build_manse_table.py --verify   # 기존 파일만 검증
+#
+# 절기 시각은 태양의 겉보기 황경이 15°의 배수가 되는 순간이다. 황경은 Meeus, Astronomical
+# Algorithms 25장의 방법(VSOP87 지구 황경 절단 급수 + FK5 보정 + 장동 + 광행차, 약 1")으로,
+# 역학시 -> 세계시 변환은 Espenak-Meeus ΔT 다항식으로 구한다. 시각은 KST(UTC+9) 고정이며
+# 과거의 UTC+8:30 표준시와 일광절약시간은 반영하지 않는다.
+
+import datetime
+import sys
+import time
+
+import numpy as np
+
+import app
+
+# VSOP87D 지구 일심 황경 L0~L5 (A [1e-8 rad], B [rad], C [rad/천년])
+VSOP_L = (
+    ((175347046, 0, 0), (3341656, 4.6692568, 6283.07585), (34894, 4.6261, 12566.1517), (3497, 2.7441, 5753.3849),
+     (3418, 2.8289, 3.5231), (3136, 3.6277, 77713.7715), (2676, 4.4181, 7860.4194), (2343, 6.1352, 3930.2097),
+     (1324, 0.7425, 11506.7698), (1273, 2.0371, 529.691), (1199, 1.1096, 1577.3435), (990, 5.233, 5884.927),
+     (902, 2.045, 26.298), (857, 3.508, 398.149), (780, 1.179, 5223.694), (753, 2.533, 5507.553),
+     (505, 4.583, 18849.228), (492, 4.205, 775.523), (357, 2.92, 0.067), (317, 5.849, 11790.629),
+     (284, 1.899, 796.298), (271, 0.315, 10977.079), (243, 0.345, 5486.778), (206, 4.806, 2544.314),
+     (205, 1.869, 5573.143), (202, 2.458, 6069.777), (156, 0.833, 213.299), (132, 3.411, 2942.463),
+     (126, 1.083, 20.775), (115, 0.645, 0.98), (103, 0.636, 4694.003), (102, 0.976, 15720.839),
+     (102, 4.267, 7.114), (99, 6.21, 2146.17), (98, 0.68, 155.42), (86, 5.98, 161000.69),
+     (85, 1.3, 6275.96), (85, 3.67, 71430.7), (80, 1.81, 17260.15), (79, 3.04, 12036.46),
+     (75, 1.76, 5088.63), (74, 3.5, 3154.69), (74, 4.68, 801.82), (70, 0.83, 9437.76),
+     (62, 3.98, 8827.39), (61, 1.82, 7084.9), (57, 2.78, 6286.6), (56, 4.39, 14143.5),
+     (56, 3.47, 6279.55), (52, 0.19, 12139.55), (52, 1.33, 1748.02), (51, 0.28, 5856.48),
+     (49, 0.49, 1194.45), (41, 5.37, 8429.24), (41, 2.4, 19651.05), (39, 6.17, 10447.39),
+     (37, 6.04, 10213.29), (37, 2.57, 1059.38), (36, 1.71, 2352.87), (36, 1.78, 6812.77),
+     (33, 0.59, 17789.85), (30, 0.44, 83996.85), (30, 2.74, 1349.87), (25, 3.16, 4690.48)),
+    ((628331966747, 0, 0), (206059, 2.678235, 6283.07585), (4303, 2.6351, 12566.1517), (425, 1.59, 3.523),
+     (119, 5.796, 26.298), (109, 2.966, 1577.344), (93, 2.59, 18849.23), (72, 1.14, 529.69),
+     (68, 1.87, 398.15), (67, 4.41, 5507.55), (59, 2.89, 5223.69), (56, 2.17, 155.42),
+     (45, 0.4, 796.3), (36, 0.47, 775.52), (29, 2.65, 7.11), (21, 5.34, 0.98),
+     (19, 1.85, 5486.78), (19, 4.97, 213.3), (17, 2.99, 6275.96), (16, 0.03, 2544.31),
+     (16, 1.43, 2146.17), (15, 1.21, 10977.08), (12, 2.83, 1748.02), (12, 3.26, 5088.63),
+     (12, 5.27, 1194.45), (12, 2.08, 4694.0), (11, 0.77, 553.57), (10, 1.3, 6286.6),
+     (10, 4.24, 1349.87), (9, 2.7, 242.73), (9, 5.64, 951.72), (8, 5.3, 2352.87),
+     (6, 2.65, 9437.76), (6, 4.67, 4690.48)),
+    ((52919, 0, 0), (8720, 1.0721, 6283.0758), (309, 0.867, 12566.152), (27, 0.05, 3.52),
+     (16, 5.19, 26.3), (16, 3.68, 155.42), (10, 0.76, 18849.23), (9, 2.06, 77713.77),
+     (7, 0.83, 775.52), (5, 4.66, 1577.34), (4, 1.03, 7.11), (4, 3.44, 5573.14),
+     (3, 5.14, 796.3), (3, 6.05, 5507.55), (3, 1.19, 242.73), (3, 6.12, 529.69),
+     (3, 0.31, 398.15), (3, 2.28, 553.57), (2, 4.38, 5223.69), (2, 3.75, 0.98)),
+    ((289, 5.844, 6283.076), (35, 0, 0), (17, 5.49, 12566.15), (3, 5.2, 155.42),
+     (1, 4.72, 3.52), (1, 5.3, 18849.23), (1, 5.97, 242.73)),
+    ((114, 3.142, 0), (8, 4.13, 6283.08), (1, 3.84, 12566.15)),
+    ((1, 3.14, 0),),
+)
+# 일심 거리 R0, R1 주요 항 (광행차 계산용, 1e-8 AU)
+VSOP_R = (
+    ((100013989, 0, 0), (1670700, 3.0984635, 6283.07585), (13956, 3.05525, 12566.1517), (3084, 5.1985, 77713.7715)),
+    ((103019, 1.10749, 6283.07585), (1721, 1.0644, 12566.1517)),
+)
+J2000 = 2451545.0
+JD_1900 = 2415020.5  # 1900-01-01 0시 UT
+KST_MINUTES = 9 * 60
+ARCSEC = np.pi / (180 * 3600)
+
+
+def _series(tables, tau):
+    total = np.zeros_like(tau)
+    for power, terms in enumerate(tables):
+        a, b, c = (np.array(col, dtype=np.float64)[:, None] for col in zip(*terms))
+        total += (a * np.cos(b + c * tau)).sum(axis=0) * tau ** power
+    return total * 1e-8
+
+
+def apparent_longitude(jde):
+    """역학시 율리우스일 배열 -> 태양 겉보기 황경 [rad, 0~2π)."""
+    tau = (np.asarray(jde, dtype=np.float64) - J2000) / 365250
+    t = tau * 10
+    lon = _series(VSOP_L, tau) + np.pi
+    # FK5 보정 (-0.09033")
+    lon += -0.09033 * ARCSEC
+    # 장동 (황경 방향, 주요 4항)
+    omega = np.radians(125.04452 - 1934.136261 * t)
+    l_sun = np.radians(280.4665 + 36000.7698 * t)
+    l_moon = np.radians(218.3165 + 481267.8813 * t)
+    lon += (-17.20 * np.sin(omega) - 1.32 * np.sin(2 * l_sun) - 0.23 * np.sin(2 * l_moon)
+            + 0.21 * np.sin(2 * omega)) * ARCSEC
+    # 광행차
+    lon += -20.4898 / _series(VSOP_R, tau) * ARCSEC
+    return np.mod(lon, 2 * np.pi)
+
+
+def delta_t(year):
+    """Espenak-Meeus 다항식 ΔT = TT - UT [초], 1900~2150."""
+    y = np.asarray(year, dtype=np.float64)
+    conds = [y < 1920, y < 1941, y < 1961, y < 1986, y < 2005, y < 2050]
+    t = [y - 1900, y - 1920, y - 1950, y - 1975, y - 2000, y - 2000]
+    polys = [
+        -2.79 + 1.494119 * t[0] - 0.0598939 * t[0] ** 2 + 0.0061966 * t[0] ** 3 - 0.000197 * t[0] ** 4,
+        21.20 + 0.84493 * t[1] - 0.0761 * t[1] ** 2 + 0.0020936 * t[1] ** 3,
+        29.07 + 0.407 * t[2] - t[2] ** 2 / 233 + t[2] ** 3 / 2547,
+        45.45 + 1.067 * t[3] - t[3] ** 2 / 260 - t[3] ** 3 / 718,
+        63.86 + 0.3345 * t[4] - 0.060374 * t[4] ** 2 + 0.0017275 * t[4] ** 3 + 0.000651814 * t[4] ** 4
+        + 0.00002373599 * t[4] ** 5,
+        62.92 + 0.32217 * t[5] + 0.005589 * t[5] ** 2,
+    ]
+    far = -20 + 32 * ((y - 1820) / 100) ** 2 - 0.5628 * (2150 - y)
+    return np.select(conds, polys, far)
+
+
+def solar_term_jde(years):
+    """years의 24절기(SOLAR_TERM_NAMES 순) 역학시 율리우스일, shape (len(years) * 24,)."""
+    years = np.repeat(np.asarray(years, dtype=np.float64), 24)
+    k = np.tile(np.arange(24), len(years) // 24)
+    target = np.radians((285 + 15 * k) % 360)
+    # 평균 시각에서 출발해 뉴턴법 (태양 황경 속도 약 360°/365.2422일)
+    jde = JD_1900 + (years - 1900) * 365.2422 + 5.0 + k * 365.2422 / 24
+    for _ in range(20):
+        diff = np.mod(target - apparent_longitude(jde) + np.pi, 2 * np.pi) - np.pi
+        jde = jde + diff * 365.2422 / (2 * np.pi)
+        if np.abs(diff).max() < 1e-9:
+            break
+    return jde
+
+
+def solar_term_minutes(years):
+    """24절기 시각을 MANSE_START 0시(KST)부터의 분으로 (반올림)."""
+    jde = solar_term_jde(years)
+    jd_ut = jde - delta_t(np.repeat(np.asarray(years), 24)) / 86400
+    return np.rint((jd_ut - JD_1900) * 1440 + KST_MINUTES).astype(np.int32)
+
+
+def build():
+    years = np.arange(app.MANSE_START.year, app.MANSE_END.year + 1)
+    return app.ManseTable.build(solar_term_minutes(years))
+
+
+# 평균 분점/지점 + 주기항 (Meeus 27장). VSOP87 풀이와는 독립적인 근사(1951~2050 최대 약 1분)
+_CARDINAL_MEAN = (
+    (2451623.80984, 365242.37404, 0.05169, -0.00411, -0.00057),
+    (2451716.56767, 365241.62603, 0.00325, 0.00888, -0.00030),
+    (2451810.21715, 365242.01767, -0.11575, 0.00337, 0.00078),
+    (2451900.05952, 365242.74049, -0.06223, -0.00823, 0.00032),
+)
+_CARDINAL_PERIODIC = (
+    (485, 324.96, 1934.136), (203, 337.23, 32964.467), (199, 342.08, 20.186), (182, 27.85, 445267.112),
+    (156, 73.14, 45036.886), (136, 171.52, 22518.443), (77, 222.54, 65928.934), (74, 296.72, 3034.906),
+    (70, 243.58, 9037.513), (58, 119.81, 33718.147), (52, 297.17, 150.678), (50, 21.02, 2281.226),
+    (45, 247.54, 29929.562), (44, 325.15, 31555.956), (29, 60.93, 4443.417), (18, 155.12, 67555.328),
+    (17, 288.79, 4562.452), (16, 198.04, 62894.029), (14, 199.76, 31436.921), (12, 95.39, 14577.848),
+    (12, 287.11, 31931.756), (12, 320.81, 34777.259), (9, 227.73, 1222.114), (8, 15.45, 16859.074),
+)
+# 공표된 절기 시각 (KST)
+KNOWN_TERMS = (
+    ("입춘", datetime.datetime(2024, 2, 4, 17, 27)),
+    ("춘분", datetime.datetime(2024, 3, 20, 12, 6)),
+    ("하지", datetime.datetime(2024, 6, 21, 5, 51)),
+    ("추분", datetime.datetime(2024, 9, 22, 21, 44)),
+    ("입춘", datetime.datetime(2025, 2, 3, 23, 10)),
+    ("춘분", datetime.datetime(2000, 3, 20, 16, 35)),
+)
+
+
+def cardinal_jde(year, quarter):
+    """year년 춘분(0)/하지(1)/추분(2)/동지(3)의 역학시 율리우스일 (Meeus 27장)."""
+    y = (year - 2000) / 1000
+    jde0 = sum(c * y ** i for i, c in enumerate(_CARDINAL_MEAN[quarter]))
+    t = (jde0 - J2000) / 36525
+    w = np.radians(35999.373 * t - 2.47)
+    dl = 1 + 0.0334 * np.cos(w) + 0.0007 * np.cos(2 * w)
+    s = sum(a * np.cos(np.radians(b + c * t)) for a, b, c in _CARDINAL_PERIODIC)
+    return jde0 + 0.00001 * s / dl
+
+
+def verify(table):
+    """절기 시각 교차 검증 + 일별 배열/조회 API를 절기 시각에서 직접 계산한 값과 대조."""
+    terms = np.asarray(table.terms, dtype=np.int64)
+    n_years = len(terms) // 24
+    years = table.y0 + np.arange(n_years)
+    # 1) 절기 간격 (태양 속도 변화로 약 14.7~15.7일)
+    gaps = np.diff(terms) / 1440
+    assert ((gaps > 14.5) & (gaps < 15.9)).all(), f"term gap out of range: {gaps.min():.2f}~{gaps.max():.2f}"
+    # 2) 독립 근사식(Meeus 27장)과 분점/지점 비교
+    worst = 0.0
+    for quarter, k in enumerate((5, 11, 17, 23)):
+        jde = np.array([cardinal_jde(y, quarter) for y in years])
+        minutes = (jde - delta_t(years) / 86400 - JD_1900) * 1440 + KST_MINUTES
+        worst = max(worst, np.abs(minutes - terms[k::24]).max())
+    assert worst <= 2, f"cardinal points differ by {worst:.1f} min"
+    # 3) 공표 시각
+    for name, when in KNOWN_TERMS:
+        got = dict(table.solar_terms(when.year))[name]
+        assert abs((got - when).total_seconds()) <= 120, f"{name} {when.year}: {got} != {when}"
+    # 4) 일별 배열 vs 절기 시각에서 직접 센 연주/월주 (매일 0시, 절입 1분 전/당시)
+    start = datetime.datetime.combine(app.MANSE_START, datetime.time())
+    jie = terms[0::2]
+    y_gz0, m_gz0 = app.approx_pillars(app.MANSE_START.year, app.MANSE_START.month, app.MANSE_START.day)
+
+    def expected(minute):
+        return (y_gz0 + np.searchsorted(jie[1::12], minute, side="right")) % 60, \
+            (m_gz0 + np.searchsorted(jie, minute, side="right")) % 60
+
+    n_days = len(table.switch_min)
+    probes = np.concatenate([np.arange(n_days) * 1440, jie - 1, jie, np.arange(n_days) * 1440 + 1439])
+    probes = probes[(probes >= 0) & (probes < n_days * 1440)]
+    dates = np.datetime64(app.MANSE_START, "D") + (probes // 1440).astype("timedelta64[D]")
+    y, m, d = app._split_datetime64(dates)
+    h, mi = probes % 1440 // 60, probes % 60
+    exp_y, exp_m = expected(probes)
+    got_y, got_m = table.pillars_bulk(y, m, d, h, mi)
+    assert (got_y == exp_y).all() and (got_m == exp_m).all(), "bulk pillars mismatch"
+    for j in range(0, len(probes), 97):
+        assert table.pillars(int(y[j]), int(m[j]), int(d[j]), int(h[j]), int(mi[j])) == (exp_y[j], exp_m[j]), \
+            f"pillars mismatch at {start + datetime.timedelta(minutes=int(probes[j]))}"
+    # 5) 절기 순서와 월지: 입춘 이후 寅월, 입춘 직전은 전년도
+    for year in (1900, 1984, 2024, 2100):
+        ipchun = dict(table.solar_terms(year))["입춘"]
+        before = ipchun - datetime.timedelta(minutes=1)
+        y_gz, m_gz = table.pillars(ipchun.year, ipchun.month, ipchun.day, ipchun.hour, ipchun.minute)
+        assert m_gz % 12 == 2 and y_gz == (year - 4) % 60, f"{year} 입춘 pillars {y_gz}, {m_gz}"
+        y_gz, m_gz = table.pillars(before.year, before.month, before.day, before.hour, before.minute)
+        assert m_gz % 12 == 1 and y_gz == (year - 5) % 60, f"{year} 입춘 직전 pillars {y_gz}, {m_gz}"
+    # 6) 근사 규칙과는 절입일 하루 안팎에서만 다르다
+    all_days = np.arange(n_days)
+    y, m, d = app._split_datetime64(np.datetime64(app.MANSE_START, "D") + all_days.astype("timedelta64[D]"))
+    approx_y, approx_m = app.approx_pillars(y, m, d)
+    noon_y, noon_m = table.pillars_bulk(y, m, d, 12, 0)
+    off = np.flatnonzero((approx_m != noon_m) | (approx_y != noon_y))
+    near = np.abs((all_days[off] * 1440)[:, None] - jie[None, :]).min(axis=1) < 2 * 1440
+    assert near.all(), f"approx rule off far from a term boundary: {off[~near][:5]}"
+    print(f"verified {n_years} years / {len(terms):,} terms / {n_days:,} days OK "
+          f"(cardinal points within {worst:.1f} min, approx rule differs on {len(off)} days)")
+
+
+if __name__ == "__main__":
+    if "--verify" not in sys.argv:
+        t0 = time.perf_counter()
+        build().save()
+        print(f"built {app.MANSE_TABLE_PATH} in {time.perf_counter() - t0:.1f}s")
+    verify(app.ManseTable.load())
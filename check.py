@@ -0,0 +1,107 @@
+# 정합성 점검 스크립트: python check.py [섹션 ...]
+# 섹션을 지정하지 않으면 전체를 실행한다. 하나라도 실패하면 종료 코드 1 (배포 전 점검용).
+# bench.py와 달리 처리량 수치 대신 결과 대조(와 상대 비교)만 하며, assert 대신 명시적으로
+# 검사하므로 python -O 에서도 그대로 동작한다.
+
+import statistics
+import sys
+import time
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+import app
+
+# 윤년 기준 모든 (월, 일)
+ALL_DAYS = [(m, d) for m in range(1, 13) for d in range(1, 32)
+            if d <= (31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)[m - 1]]
+
+
+class CheckFailed(Exception):
+    pass
+
+
+def _expect(cond, msg):
+    if not cond:
+        raise CheckFailed(msg)
+
+
+def zodiac_scan(dates, m, d):
+    # 테이블 도입 전 get_zodiac_info의 선형 탐색 (대조/비교용)
+    z_eng, z_kor, z_desc = "Capricorn", "염소자리", "Ambitious"
+    md = m * 100 + d
+    for cm, cd, eng, kor, desc in dates:
+        start_md = cm * 100 + cd
+        idx = dates.index((cm, cd, eng, kor, desc))
+        nm, nd, _, _, _ = dates[(idx + 1) % 12]
+        if eng == "Capricorn":
+            if md >= 1225 or md <= 119:
+                z_eng, z_kor, z_desc = eng, kor, desc; break
+        else:
+            if start_md <= md < nm * 100 + nd:
+                z_eng, z_kor, z_desc = eng, kor, desc; break
+    return z_eng, z_kor, z_desc
+
+
+def check_zodiac():
+    """get_zodiac_info 테이블(스칼라/벡터) vs 선형 탐색: 모든 날짜 + 염소자리 경계일."""
+    engine = app.UniversalEngine()
+    dates = engine.db.zodiac_dates
+    for m, d in ALL_DAYS:
+        got, expect = engine.get_zodiac_info(m, d), zodiac_scan(dates, m, d)
+        _expect(got == expect, f"{m}/{d}: table {got} != scan {expect}")
+    mm, dd = np.array(ALL_DAYS).T
+    bulk = [dates[i][2] for i in app.zodiac_index_bulk(mm, dd)]
+    _expect(bulk == [zodiac_scan(dates, m, d)[0] for m, d in ALL_DAYS], "zodiac_index_bulk != scan")
+    # 해를 넘는 염소자리(12/25 ~ 1/19)와 그 양옆
+    for (m, d), eng in {(12, 24): "Sagittarius", (12, 25): "Capricorn", (12, 31): "Capricorn",
+                        (1, 1): "Capricorn", (1, 19): "Capricorn", (1, 20): "Aquarius"}.items():
+        got = engine.get_zodiac_info(m, d)[0]
+        _expect(got == eng, f"{m}/{d}: {got} != {eng}")
+    print(f"[zodiac] {len(ALL_DAYS)} days OK")
+
+
+def check_chart(samples=12):
+    """SVG 차트: 올바른 XML, 해당 별자리 한 칸만 강조, ☉ 표시. PNG 대비 리포트 HTML이 작고 렌더링이 빠른지."""
+    engine = app.get_engine()
+    ns = "{http://www.w3.org/2000/svg}"
+    days = [(m, 15) for m in range(1, 13)][:samples]
+    lat = {fmt: [] for fmt in app.CHART_RENDERERS}
+    for m, d in days:
+        z_eng = engine.get_zodiac_info(m, d)[0]
+        out = {}
+        for fmt, renderer in app.CHART_RENDERERS.items():
+            t0 = time.perf_counter()
+            out[fmt] = renderer.__wrapped__(z_eng, m, d)  # 캐시 우회
+            lat[fmt].append(time.perf_counter() - t0)
+        root = ET.fromstring(out["svg"])
+        lit = [i for i, p in enumerate(root.iter(f"{ns}path")) if p.get("fill") == "#9c27b0"]
+        _expect(lit == [app.CHART_LABELS.index(z_eng)], f"{m}/{d} {z_eng}: highlighted sectors {lit}")
+        _expect([t.text for t in root.iter(f"{ns}text")].count("☉") == 1, f"{m}/{d}: no ☉ marker")
+        size = {fmt: len(engine.generate_full_report("홍길동", "남자", 1990, m, d, 12, False, "x", "KO",
+                                                      chart_format=fmt).encode()) for fmt in app.CHART_RENDERERS}
+        _expect(size["svg"] < size["png"], f"{m}/{d}: svg report {size['svg']} B >= png {size['png']} B")
+    p50 = {fmt: statistics.median(v) for fmt, v in lat.items()}
+    _expect(p50["svg"] < p50["png"], f"svg render {p50['svg'] * 1000:.2f} ms >= png {p50['png'] * 1000:.2f} ms")
+    print(f"[chart] {len(days)} charts OK  (render p50 svg {p50['svg'] * 1000:.2f} ms / png {p50['png'] * 1000:.2f} ms)")
+
+
+CHECKS = {
+    "zodiac": check_zodiac,
+    "chart": check_chart,
+}
+
+
+def main(argv):
+    failed = []
+    for name in argv or CHECKS:
+        try:
+            CHECKS[name]()
+        except CheckFailed as e:
+            print(f"[{name}] FAILED: {e}")
+            failed.append(name)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))